@@ -9,158 +9,385 @@ This script runs the complete Bitcoin volatility analysis pipeline:
 4. Hypothesis testing (event impact analysis)
 5. Visualization generation
 
+Run with --append to update an existing run with the bars published since
+the last one instead of recomputing everything from scratch, with --stream
+to follow a live feed (replayed from the saved CSV unless --feed-url is given),
+or with --serve to answer analysis queries over HTTP from the saved data.
 """
 
 import sys
 import os
+import json
+import asyncio
+import argparse
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
+
 # Add src directory to Python path
 project_root = Path(__file__).resolve().parent
 src_path = project_root / 'src'
 sys.path.insert(0, str(src_path))
 
 # Import modules
-from data_collection.bitcoin_prices import collect_bitcoin_data, save_bitcoin_data
+from data_collection.bitcoin_prices import (collect_bitcoin_data, save_bitcoin_data, load_bitcoin_data,
+                                            collect_new_bitcoin_bars, append_bitcoin_data, append_bitcoin_rows)
 from data_collection.market_events import create_events_database, save_events_data
-from analysis.descriptive_stats import calculate_descriptive_stats, test_normality
+from data_collection.market_assets import load_asset_returns
+from data_collection.live_feed import ReplaySource, WebSocketSource
+from analysis.descriptive_stats import (calculate_descriptive_stats, test_normality,
+                                        RunningMoments, test_normality_from_moments)
 from analysis.distribution_analysis import test_normality_comprehensive, fit_alternative_distributions
-from analysis.hypothesis_tests import event_impact_analysis, correlation_analysis
+from analysis.hypothesis_tests import (event_impact_analysis, correlation_analysis, update_event_impacts,
+                                      severity_impact_surface, stratified_event_analysis)
+from analysis.risk import monte_carlo_var_es, historical_var_es
+from analysis.volatility_forecasting import walk_forward_backtest
+from analysis.streaming import stream_analysis
+from analysis.results_store import ResultsStore
+from analysis.seasonality import volatility_profiles, bin_factors, deseasonalize as deseasonalize_returns
+from analysis.event_tensor import asset_frames, export_event_tensor, update_event_tensor
+from analysis.query_service import serve
 from visualization.plots import plot_bitcoin_timeseries, plot_distribution_analysis
 
-def main():
+results_dir = project_root / 'results'
+state_file = project_root / 'data' / 'processed' / 'pipeline_state.json'
+impacts_file = project_root / 'data' / 'processed' / 'event_impacts.csv'
+
+# Derived columns tracked with running moments between runs
+MOMENT_COLUMNS = {'returns': 'Daily_Return', 'volatility': 'Volatility_30d', 'prices': 'Close'}
+
+# Sections an --append run takes over from the last full run (source -> section in the append run)
+CARRIED_SECTIONS = {'seasonality': 'seasonality', 'distribution_tests': 'distribution_tests',
+                    'distribution_fit': 'distribution_fit', 'risk_mc': 'risk_mc', 'risk_historical': 'risk_historical',
+                    'vol_forecast': 'vol_forecast', 'severity_surface': 'severity_surface',
+                    'normality': 'normality_full'}
+
+
+def save_pipeline_state(btc_data, moments, impact_results, seasonal_factors=None):
+    """
+    Persist what an --append run needs: last bar, running moments, event results
+    and the seasonal factors of a deseasonalized event study (None if not used)
+    """
+    state = {
+        'first_date': btc_data.index.min().strftime('%Y-%m-%d'),
+        'last_date': btc_data.index.max().strftime('%Y-%m-%d'),
+        'records': len(btc_data),
+        'deseasonalize': seasonal_factors is not None,
+        'seasonal_factors': seasonal_factors,
+        'moments': {name: m.to_dict() for name, m in moments.items()}
+    }
+    state_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(state_file, 'w') as f:
+        json.dump(state, f, indent=2)
+    impact_results.to_csv(impacts_file, index=False)
+
+
+def load_pipeline_state():
+    """
+    Load the state saved by the previous run, or None if there is none
+    """
+    if not state_file.exists() or not impacts_file.exists():
+        return None
+    with open(state_file) as f:
+        state = json.load(f)
+    state['moments'] = {name: RunningMoments.from_dict(m) for name, m in state['moments'].items()}
+    state['impact_results'] = pd.read_csv(impacts_file)
+    return state
+
+
+def write_reports(store, run_id):
+    """
+    Regenerate the text reports of a run from the results store
+    """
+    results_dir.mkdir(exist_ok=True)
+    with open(results_dir / 'descriptive_stats.txt', 'w') as f:
+        f.write(store.render_descriptive_stats(run_id))
+    with open(results_dir / 'analysis_summary.txt', 'w') as f:
+        f.write(store.render_summary_report(run_id))
+
+
+def run_append():
+    """
+    Update the previous run with new bars in O(new rows)
+
+    Derived columns and running moments are extended from the stored tail,
+    only events whose windows reach the new data are re-evaluated (and
+    re-plotted), the per-type impact groups are recomputed from the merged
+    rows, and the reports are rewritten from the updated state. Order
+    statistics (median, quantiles), Shapiro/KS tests, seasonality,
+    distribution fits, risk measures, volatility forecasts and the severity
+    surface are carried over from the last full run, labelled with its id,
+    and refreshed by the next full run.
+    """
+    print("=" * 60)
+    print("BITCOIN VOLATILITY ANALYSIS - APPEND MODE")
+    print("=" * 60)
+
+    state = load_pipeline_state()
+    btc_data = load_bitcoin_data()
+    if state is None or btc_data is None:
+        print("No previous run found, running the full analysis instead.")
+        return main()
+
+    print(f"\n1. COLLECTING BARS AFTER {state['last_date']}...")
+    print("-" * 30)
+    new_bars = collect_new_bitcoin_bars(state['last_date'])
+    if new_bars is None:
+        print("ERROR: Failed to collect new Bitcoin bars. Exiting.")
+        return 1
+    btc_data, new_rows = append_bitcoin_data(btc_data, new_bars)
+    if len(new_rows) == 0:
+        print("✓ Already up to date, nothing to do")
+        return 0
+    append_bitcoin_rows(new_rows)
+    print(f"✓ {len(new_rows)} new records ({new_rows.index.min().date()} to {new_rows.index.max().date()})")
+
+    events_data = create_events_database()
+    store = ResultsStore()
+    deseasonalize = state.get('deseasonalize', False)
+    run_id = store.start_run(btc_data, events_data, mode='append',
+                             parameters={'window_days': 10, 'deseasonalize': deseasonalize})
+
+    print("\n2. UPDATING RUNNING STATISTICS...")
+    print("-" * 40)
+    moments = state['moments']
+    for name, col in MOMENT_COLUMNS.items():
+        moments[name].update(new_rows[col])
+    desc_stats = {name: m.summary() for name, m in moments.items()}
+    normality_results = test_normality_from_moments(moments['returns'])
+    store.save_results(run_id, 'descriptive', desc_stats)
+    store.save_results(run_id, 'normality', normality_results)
+    print("✓ Descriptive statistics updated")
+
+    print("\n3. RE-EVALUATING AFFECTED EVENTS...")
+    print("-" * 30)
+    # Factors stay those of the last full run, so every stored impact uses the same scaling
+    seasonal_factors = state.get('seasonal_factors')
+    if deseasonalize and seasonal_factors is None:
+        # State saved before the factors were stored: re-estimate them on the previous run's data
+        seasonal_factors = bin_factors(btc_data.loc[:state['last_date']])
+    event_data = deseasonalize_returns(btc_data, factors=seasonal_factors) if deseasonalize else btc_data
+    impact_results, updated_ids = update_event_impacts(event_data, events_data, state['impact_results'],
+                                                       new_rows.index.min())
+    correlation_results = correlation_analysis(event_data, events_data, event_impacts=impact_results)
+    store.save_event_impacts(run_id, impact_results)
+    store.save_results(run_id, 'correlation', correlation_results)
+    store.save_table(run_id, 'event_groups', stratified_event_analysis(impact_results))
+    update_event_tensor(asset_frames(btc_data, load_asset_returns()), events_data)
+    print(f"✓ {len(updated_ids)} events re-evaluated")
+
+    full_run = store.latest_run(mode='full')
+    if full_run is not None:
+        store.carry_over(run_id, full_run, CARRIED_SECTIONS)
+
+    print("\n4. REGENERATING AFFECTED OUTPUTS...")
+    print("-" * 35)
+    try:
+        plot_bitcoin_timeseries(btc_data, fast=True, show=False)
+        plot_distribution_analysis(btc_data, fast=True, show=False)
+    except Exception as e:
+        print(f"Warning: Error generating visualizations: {e}")
+    write_reports(store, run_id)
+    store.close()
+    save_pipeline_state(btc_data, moments, impact_results, seasonal_factors)
+    print(f"✓ Reports and state updated (run {run_id})")
+
+    return 0
+
+
+def run_stream(feed_url=None, replay_delay=0.0):
+    """
+    Follow a live feed, printing alerts when post-event volatility exceeds its baseline
+    """
+    print("=" * 60)
+    print("BITCOIN VOLATILITY ANALYSIS - STREAMING MODE")
+    print("=" * 60)
+
+    source = WebSocketSource(feed_url) if feed_url else ReplaySource(delay=replay_delay)
+    events_data = create_events_database()
+    state = asyncio.run(stream_analysis(source, events_data))
+
+    volatility = state['volatility']
+    print(f"\n✓ Stream ended after {volatility.moments.n} returns")
+    print(f"Last 30d volatility: {volatility.window_moments.std:.4f}, "
+          f"EWMA volatility: {np.sqrt(volatility.ewma_variance):.4f}")
+    return 0
+
+
+def main(deseasonalize=False):
     """
     Main execution function for Bitcoin volatility analysis
+
+    With deseasonalize=True the event study runs on returns scaled by their
+    day-of-week volatility factor.
     """
     print("=" * 60)
     print("BITCOIN VOLATILITY ANALYSIS")
     print("=" * 60)
-    
+
     # Step 1: Data Collection
     print("\n1. COLLECTING DATA...")
     print("-" * 30)
-    
+
     # Collect Bitcoin price data
     print("Collecting Bitcoin price data...")
     btc_data = collect_bitcoin_data()
     if btc_data is None:
         print("ERROR: Failed to collect Bitcoin data. Exiting.")
         return 1
-    
+
     # Save Bitcoin data
     save_bitcoin_data(btc_data)
-    
+
     # Create and save market events data
     print("Creating market events database...")
     events_data = create_events_database()
     save_events_data(events_data)
-    
+
     print(f"✓ Data collection complete: {len(btc_data)} Bitcoin records, {len(events_data)} events")
-    
+
+    # Every result of this run is keyed by its run id in the results store
+    store = ResultsStore()
+    run_id = store.start_run(btc_data, events_data, mode='full', parameters={
+        'window_days': 10, 'risk_model': 'distribution', 'mc_paths': 100_000, 'mc_seed': 42,
+        'deseasonalize': deseasonalize})
+
     # Step 2: Descriptive Statistics
     print("\n2. CALCULATING DESCRIPTIVE STATISTICS...")
     print("-" * 40)
-    
+
     desc_stats = calculate_descriptive_stats(btc_data)
     normality_results = test_normality(btc_data['Daily_Return'].dropna())
-    
+
     # Save descriptive statistics
-    results_dir = project_root / 'results'
-    results_dir.mkdir(exist_ok=True)
-    
-    with open(results_dir / 'descriptive_stats.txt', 'w') as f:
-        f.write("BITCOIN VOLATILITY ANALYSIS - DESCRIPTIVE STATISTICS\n")
-        f.write("=" * 50 + "\n\n")
-        f.write("DESCRIPTIVE STATISTICS:\n")
-        f.write(str(desc_stats))
-        f.write("\n\nNORMALITY TEST RESULTS:\n")
-        f.write(str(normality_results))
-    
+    store.save_results(run_id, 'descriptive', desc_stats)
+    store.save_results(run_id, 'normality', normality_results)
+
+    # Calendar volatility profiles (day of week, month, weekend)
+    profiles = volatility_profiles(btc_data)
+    store.save_results(run_id, 'seasonality', {key: {**profile.to_dict('index'), 'attrs': profile.attrs}
+                                               for key, profile in profiles.items()})
+
     print("✓ Descriptive statistics calculated and saved")
-    
+
     # Step 3: Distribution Analysis
     print("\n3. ANALYZING DISTRIBUTIONS...")
     print("-" * 30)
-    
+
     returns = btc_data['Daily_Return'].dropna()
     dist_tests = test_normality_comprehensive(returns)
     alt_distributions = fit_alternative_distributions(returns)
-    
+
+    # Risk measures driven by the fitted distributions
+    historical_risk = historical_var_es(returns)
+    mc_risk = monte_carlo_var_es(returns, model='distribution', seed=42)
+
+    store.save_results(run_id, 'distribution_tests', dist_tests)
+    store.save_results(run_id, 'distribution_fit', alt_distributions)
+    store.save_table(run_id, 'risk_mc', mc_risk)
+    store.save_table(run_id, 'risk_historical', historical_risk)
+
+    # Walk-forward volatility forecasts, scored against squared returns
+    forecast_losses, forecasts = walk_forward_backtest(returns.rename('BTC-USD'))
+    forecast_losses['next_day_volatility'] = [np.sqrt(forecasts[key].iloc[-1]) for key in forecast_losses.index]
+    store.save_table(run_id, 'vol_forecast', forecast_losses.loc['BTC-USD'])
+
     print("✓ Distribution analysis complete")
-    
+
     # Step 4: Event Impact Analysis
     print("\n4. ANALYZING EVENT IMPACTS...")
     print("-" * 30)
-    
-    impact_results = event_impact_analysis(btc_data, events_data)
-    correlation_results = correlation_analysis(btc_data, events_data)
-    
+
+    seasonal_factors = bin_factors(btc_data) if deseasonalize else None
+    event_data = deseasonalize_returns(btc_data, factors=seasonal_factors) if deseasonalize else btc_data
+    impact_results = event_impact_analysis(event_data, events_data)
+    correlation_results = correlation_analysis(event_data, events_data, event_impacts=impact_results)
+    store.save_event_impacts(run_id, impact_results)
+    store.save_results(run_id, 'correlation', correlation_results)
+
+    # Impacts by event type and price direction, FDR-corrected across all groups
+    stratified = stratified_event_analysis(impact_results)
+    store.save_table(run_id, 'event_groups', stratified)
+
+    # Sensitivity of the severity relationship to the window length (1-60 days)
+    surface = severity_impact_surface(event_data, events_data, seed=42)
+    store.save_table(run_id, 'severity_surface', surface)
+
+    # Aligned (events x assets x offsets x features) windows for downstream modelling
+    export_event_tensor(asset_frames(btc_data, load_asset_returns()), events_data)
+
     print(f"✓ Event impact analysis complete: {len(impact_results)} events analyzed")
-    
+
     # Step 5: Generate Visualizations
     print("\n5. GENERATING VISUALIZATIONS...")
     print("-" * 35)
-    
+
     try:
-        plot_bitcoin_timeseries(btc_data)
-        plot_distribution_analysis(btc_data)
+        plot_bitcoin_timeseries(btc_data, fast=True, show=False)
+        plot_distribution_analysis(btc_data, fast=True, show=False)
         print("✓ Visualizations generated and saved")
     except Exception as e:
         print(f"Warning: Error generating visualizations: {e}")
-    
+
     # Step 6: Summary Report
     print("\n6. GENERATING SUMMARY REPORT...")
     print("-" * 35)
-    
-    # Create summary report
-    summary_file = results_dir / 'analysis_summary.txt'
-    with open(summary_file, 'w') as f:
-        f.write("BITCOIN VOLATILITY ANALYSIS - SUMMARY REPORT\n")
-        f.write("=" * 50 + "\n\n")
-        f.write(f"Analysis Date: {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-        f.write(f"Data Period: {btc_data.index.min().strftime('%Y-%m-%d')} to {btc_data.index.max().strftime('%Y-%m-%d')}\n")
-        f.write(f"Total Records: {len(btc_data)}\n")
-        f.write(f"Total Events: {len(events_data)}\n\n")
-        
-        f.write("KEY FINDINGS:\n")
-        f.write("-" * 15 + "\n")
-        f.write(f"Mean Daily Return: {desc_stats['returns']['mean']:.4f}\n")
-        f.write(f"Daily Return Std Dev: {desc_stats['returns']['std']:.4f}\n")
-        f.write(f"Mean Volatility (30d): {desc_stats['volatility']['mean']:.4f}\n")
-        f.write(f"Returns Skewness: {desc_stats['returns']['skewness']:.4f}\n")
-        f.write(f"Returns Kurtosis: {desc_stats['returns']['kurtosis']:.4f}\n\n")
-        
-        f.write("NORMALITY TESTS:\n")
-        f.write("-" * 15 + "\n")
-        for test_name, test_result in normality_results.items():
-            f.write(f"{test_name}: {'Normal' if test_result['is_normal'] else 'Not Normal'} (p={test_result['p_value']:.4f})\n")
-        
-        f.write(f"\nEVENT IMPACT ANALYSIS:\n")
-        f.write("-" * 20 + "\n")
-        f.write(f"Events with significant impact: {impact_results['significant'].sum()}\n")
-        f.write(f"Correlation between severity and volatility change: {correlation_results['correlation_coefficient']:.4f}\n")
-        f.write(f"Correlation significant: {correlation_results['significant']}\n")
-    
+
+    write_reports(store, run_id)
+    store.close()
+
+    # Seed the state used by --append runs
+    moments = {name: RunningMoments() for name in MOMENT_COLUMNS}
+    for name, col in MOMENT_COLUMNS.items():
+        moments[name].update(btc_data[col])
+    save_pipeline_state(btc_data, moments, impact_results, seasonal_factors)
+
     print("✓ Summary report generated")
-    
+
     # Final success message
     print("\n" + "=" * 60)
     print("ANALYSIS COMPLETE!")
     print("=" * 60)
     print(f"Results saved to: {results_dir}")
     print("Generated files:")
+    print(f"  - results.db (run {run_id})")
     print("  - descriptive_stats.txt")
     print("  - analysis_summary.txt")
     print("  - bitcoin_timeseries.png")
     print("  - distribution_analysis.png")
     print("  - event_*_impact.png (for each event)")
-    
+    print("  - data/processed/event_tensor.npy (+ .json metadata)")
+
     return 0
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bitcoin volatility analysis pipeline")
+    parser.add_argument('--append', action='store_true',
+                        help="update the previous run with new bars instead of recomputing everything")
+    parser.add_argument('--stream', action='store_true',
+                        help="run online volatility and event alerts against a live feed")
+    parser.add_argument('--feed-url', default=None,
+                        help="websocket URL for --stream (default: replay data/raw/bitcoin_prices.csv)")
+    parser.add_argument('--replay-delay', type=float, default=0.0,
+                        help="seconds between replayed bars in --stream mode")
+    parser.add_argument('--deseasonalize', action='store_true',
+                        help="remove day-of-week volatility effects before the event study")
+    parser.add_argument('--serve', action='store_true',
+                        help="run the local HTTP query service over the saved data")
+    parser.add_argument('--port', type=int, default=8050, help="port for --serve")
+    parser.add_argument('--workers', type=int, default=8, help="request worker threads for --serve")
+    args = parser.parse_args()
+
     try:
-        import pandas as pd
-        exit_code = main()
+        if args.serve:
+            exit_code = serve(port=args.port, workers=args.workers)
+        elif args.stream:
+            exit_code = run_stream(args.feed_url, args.replay_delay)
+        elif args.append:
+            exit_code = run_append()
+        else:
+            exit_code = main(deseasonalize=args.deseasonalize)
         sys.exit(exit_code)
     except KeyboardInterrupt:
         print("\nAnalysis interrupted by user.")
@@ -45,6 +45,7 @@ def test_project_structure():
         'src/analysis/descriptive_stats.py',
         'src/analysis/distribution_analysis.py',
         'src/analysis/hypothesis_tests.py',
+        'src/analysis/kernels.py',
         'src/visualization/plots.py'
     ]
     
@@ -90,6 +91,231 @@ def test_data_collection():
     
     return True
 
+def test_kernels():
+    """Test that the NumPy kernels match the Numba (or pure-Python loop) kernels"""
+    print("\nTesting kernel backends...")
+    script_dir = Path(__file__).resolve().parent
+    repo_root = script_dir.parent
+    try:
+        sys.path.insert(0, str(repo_root / 'src'))
+
+        import numpy as np
+        import pandas as pd
+        from analysis import kernels
+
+        reference = 'numba' if 'numba' in kernels.KERNELS else 'python loops'
+        for seed in range(3):
+            kernels.compare_backends(kernels.KERNELS.get('numba', kernels.LOOP_KERNELS),
+                                     kernels.KERNELS['numpy'], seed=seed)
+        print(f"✓ numpy kernels match {reference} kernels")
+
+        # Volatility_30d must stay identical to the pandas definition on every backend
+        returns = pd.Series(np.random.default_rng(0).standard_normal(500) * 0.03).pct_change()
+        for backend in kernels.KERNELS:
+            kernels.set_backend(backend)
+            if not np.allclose(kernels.rolling_std(returns, 30), returns.rolling(window=30).std(),
+                               rtol=1e-9, equal_nan=True):
+                print(f"✗ {backend} rolling_std differs from pandas rolling std")
+                return False
+        kernels.set_backend()
+        print(f"✓ rolling_std matches pandas on: {', '.join(kernels.KERNELS)}")
+
+    except Exception as e:
+        print(f"✗ Kernel test failed: {e}")
+        return False
+
+    return True
+
+def test_rolling_fits():
+    """Test that rolling fits follow fit_every even when results are reported on another step"""
+    print("\nTesting rolling distribution refits...")
+    script_dir = Path(__file__).resolve().parent
+    repo_root = script_dir.parent
+    try:
+        sys.path.insert(0, str(repo_root / 'src'))
+
+        import numpy as np
+        import pandas as pd
+        from scipy import stats
+        from analysis.distribution_analysis import rolling_distribution_analysis
+
+        returns = pd.Series(np.random.default_rng(0).standard_t(4, 600) * 0.02,
+                            index=pd.date_range('2020-01-01', periods=600))
+        fits = []
+        original_fit = stats.t.fit
+        stats.t.fit = lambda *args, **kwargs: fits.append(1) or original_fit(*args, **kwargs)
+        try:
+            rolling = rolling_distribution_analysis(returns, window=252, step=5, fit_every=3)
+        finally:
+            del stats.t.fit
+
+        expected = len(range(0, 600 - 252 + 1, 3))
+        if len(fits) != expected:
+            print(f"✗ {len(fits)} fits for window=252, step=5, fit_every=3 (expected {expected})")
+            return False
+        # Every reported window is more than fit_every apart, so none may reuse the previous parameters
+        params = rolling[['t_df', 't_loc', 't_scale']].to_numpy()
+        if np.any(np.all(params[1:] == params[:-1], axis=1)):
+            print("✗ Reported rows carry stale distribution parameters")
+            return False
+        print(f"✓ {len(fits)} refits for {len(rolling)} reported windows (step=5, fit_every=3)")
+
+    except Exception as e:
+        print(f"✗ Rolling fit test failed: {e}")
+        return False
+
+    return True
+
+def test_risk():
+    """Test the VaR/ES engine against known answers, across worker counts and for look-ahead"""
+    print("\nTesting risk measures...")
+    script_dir = Path(__file__).resolve().parent
+    repo_root = script_dir.parent
+    try:
+        sys.path.insert(0, str(repo_root / 'src'))
+
+        import numpy as np
+        import pandas as pd
+        from scipy import stats
+        from analysis.risk import (monte_carlo_var_es, historical_var_es, kupiec_test, backtest_var,
+                                   build_risk_model)
+
+        # Historical quantiles: 1-day VaR of -0.10..0.09 interpolates to 0.0905, ES is the worst day;
+        # alternating +10%/-10% days compound to -1% over every 2-day window
+        one_day = historical_var_es(np.linspace(-0.10, 0.09, 20), horizons=(1,), confidence_levels=(0.95,))
+        two_day = historical_var_es(np.tile([0.1, -0.1], 10), horizons=(2,), confidence_levels=(0.95,))
+        if not (np.allclose(one_day[['var', 'es']].to_numpy(), [[0.0905, 0.10]])
+                and np.allclose(two_day[['var', 'es']].to_numpy(), [[0.01, 0.01]])):
+            print("✗ historical_var_es differs from the known quantiles")
+            return False
+        print("✓ historical_var_es matches known answers")
+
+        # Kupiec: 5 exceptions in 250 days at 99% gives LR=1.9568, no exceptions LR=-2*250*ln(0.99)
+        five = kupiec_test(np.arange(250) < 5, 0.99)
+        none = kupiec_test(np.zeros(250, dtype=bool), 0.99)
+        if not (np.isclose(five['lr_statistic'], 1.956810) and np.isclose(five['p_value'], 0.161855, atol=1e-6)
+                and not five['rejected'] and np.isclose(none['lr_statistic'], 5.025168) and none['rejected']):
+            print("✗ kupiec_test differs from the known likelihood ratios")
+            return False
+        print("✓ kupiec_test matches known answers")
+
+        # Monte Carlo: same seed, same table whatever the worker count, and close to the normal VaR
+        returns = pd.Series(np.random.default_rng(0).standard_t(5, 750) * 0.02)
+        normal = {'kind': 'distribution', 'distribution': 'norm', 'parameters': (0.0, 0.02)}
+        fhs = build_risk_model(returns, 'fhs')
+        for spec in (normal, fhs):
+            tables = [monte_carlo_var_es(returns, model=spec, n_paths=40_000, chunk_size=10_000,
+                                         n_workers=n_workers, seed=7) for n_workers in (1, 3)]
+            if not tables[0].equals(tables[1]):
+                print(f"✗ monte_carlo_var_es ({spec['kind']}) depends on the number of workers")
+                return False
+        var_99 = monte_carlo_var_es(returns, horizons=(1,), confidence_levels=(0.99,), model=normal,
+                                    n_paths=40_000, seed=7)
+        if not np.isclose(var_99['var'].iloc[0], -stats.norm.ppf(0.01, 0, 0.02), rtol=0.03):
+            print("✗ Monte Carlo VaR of a normal model is off the analytic quantile")
+            return False
+        print("✓ monte_carlo_var_es reproducible across workers and matches the normal VaR")
+
+        # Walk-forward backtests: changing returns from day k on must not move any forecast up to day k;
+        # k is a refit day, so a fit that saw its own day's return would show up
+        k = 250 + 3 * 20
+        shocked = returns.copy()
+        shocked.iloc[k:] *= 3
+        for method in ('historical', 'fhs'):
+            forecasts = [backtest_var(r, method=method, window=250, refit_every=20)[0]['var_forecast']
+                         for r in (returns, shocked)]
+            if not np.array_equal(forecasts[0].loc[:k], forecasts[1].loc[:k]):
+                print(f"✗ {method} VaR backtest forecasts use returns from later days")
+                return False
+            if np.array_equal(forecasts[0].loc[k + 1:], forecasts[1].loc[k + 1:]):
+                print(f"✗ {method} VaR backtest forecasts ignore new returns")
+                return False
+        print("✓ backtest_var forecasts only use earlier returns")
+
+    except Exception as e:
+        print(f"✗ Risk test failed: {e}")
+        return False
+
+    return True
+
+def test_append():
+    """Test that an --append update over the last rows matches a full recompute"""
+    print("\nTesting append mode against a full run...")
+    script_dir = Path(__file__).resolve().parent
+    repo_root = script_dir.parent
+    try:
+        sys.path.insert(0, str(repo_root / 'src'))
+
+        import numpy as np
+        import pandas as pd
+        from scipy import stats
+        from analysis.kernels import rolling_std
+        from analysis.descriptive_stats import RunningMoments
+        from analysis.hypothesis_tests import event_impact_analysis, update_event_impacts
+        from data_collection.bitcoin_prices import append_bitcoin_data
+        from data_collection.market_events import create_events_database
+
+        # Synthetic daily bars over the events period, derived as in collect_bitcoin_data
+        rng = np.random.default_rng(0)
+        dates = pd.date_range('2020-01-01', '2024-12-31', freq='D', name='Date')
+        close = 7000 * np.exp(np.cumsum(rng.standard_t(4, len(dates)) * 0.025))
+        bars = pd.DataFrame({'Adj Close': close, 'Close': close, 'High': close * 1.02, 'Low': close * 0.98,
+                             'Open': close, 'Volume': rng.uniform(1e9, 5e9, len(dates))}, index=dates)
+
+        def derive(raw):
+            btc = raw.copy()
+            btc['Daily_Return'] = btc['Close'].pct_change()
+            btc['Volatility_30d'] = rolling_std(btc['Daily_Return'], window=30)
+            btc['Abs_Return'] = abs(btc['Daily_Return'])
+            return btc.dropna()
+
+        n_new = 40
+        events = create_events_database()
+        full = derive(bars)
+        full_impacts = event_impact_analysis(full, events, plot=False)
+
+        # Full run on the truncated data, then the O(new rows) append of the last n_new bars
+        previous = derive(bars.iloc[:-n_new])
+        previous_impacts = event_impact_analysis(previous, events, plot=False)
+        moments = RunningMoments()
+        moments.update(previous['Daily_Return'])
+        extended, new_rows = append_bitcoin_data(previous, bars.iloc[-n_new:])
+        moments.update(new_rows['Daily_Return'])
+        impacts, updated_ids = update_event_impacts(extended, events, previous_impacts, new_rows.index.min(),
+                                                    plot=False)
+
+        columns = ['Daily_Return', 'Volatility_30d', 'Abs_Return']
+        if not (extended.index.equals(full.index)
+                and np.allclose(extended[columns], full[columns], rtol=1e-9, atol=1e-12)):
+            print("✗ Appended derived columns differ from a full recompute")
+            return False
+
+        returns = full['Daily_Return']
+        expected = [len(returns), returns.mean(), returns.std(), returns.min(), returns.max(),
+                    stats.skew(returns), stats.kurtosis(returns)]
+        actual = [moments.n, moments.mean, moments.std, moments.min, moments.max, moments.skewness,
+                  moments.kurtosis]
+        if not np.allclose(actual, expected, rtol=1e-9):
+            print("✗ Updated running moments differ from a full recompute")
+            return False
+
+        numeric = ['severity', 'before_volatility_mean', 'after_volatility_mean', 'volatility_change',
+                   't_statistic', 'p_value']
+        full_impacts = full_impacts.sort_values('event_id').reset_index(drop=True)
+        if not (len(updated_ids) > 0 and impacts['event_id'].tolist() == full_impacts['event_id'].tolist()
+                and (impacts['significant'] == full_impacts['significant']).all()
+                and np.allclose(impacts[numeric].to_numpy(dtype=float), full_impacts[numeric].to_numpy(dtype=float),
+                                rtol=1e-9, atol=1e-12, equal_nan=True)):
+            print("✗ Updated event impacts differ from a full recompute")
+            return False
+        print(f"✓ Append of {n_new} rows matches a full run ({len(updated_ids)} events re-evaluated)")
+
+    except Exception as e:
+        print(f"✗ Append test failed: {e}")
+        return False
+
+    return True
+
 def main():
     """Main test function"""
     print("=" * 50)
@@ -104,6 +330,18 @@ def main():
     
     # Test data collection
     data_test_passed = test_data_collection()
+
+    # Test kernel backends
+    kernels_test_passed = test_kernels()
+
+    # Test rolling distribution refits
+    rolling_test_passed = test_rolling_fits()
+
+    # Test risk measures
+    risk_test_passed = test_risk()
+
+    # Test append mode
+    append_test_passed = test_append()
     
     # Summary
     print("\n" + "=" * 50)
@@ -125,8 +363,29 @@ def main():
         print("✓ Data collection functions working")
     else:
         print("✗ Data collection functions failed")
+
+    if kernels_test_passed:
+        print("✓ Kernel backends equivalent")
+    else:
+        print("✗ Kernel backends differ")
+
+    if rolling_test_passed:
+        print("✓ Rolling refits on schedule")
+    else:
+        print("✗ Rolling refits off schedule")
+
+    if risk_test_passed:
+        print("✓ Risk measures verified")
+    else:
+        print("✗ Risk measures failed")
+
+    if append_test_passed:
+        print("✓ Append mode matches a full run")
+    else:
+        print("✗ Append mode differs from a full run")
     
-    if not failed_imports and not missing_files and data_test_passed:
+    if (not failed_imports and not missing_files and data_test_passed and kernels_test_passed
+            and rolling_test_passed and risk_test_passed and append_test_passed):
         print("\n🎉 ALL TESTS PASSED! The project is ready to use.")
         print("Run: python main.py")
         return 0
@@ -0,0 +1,157 @@
+# File: src/analysis/correlation.py
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy import optimize, signal
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from analysis.risk import fit_garch
+
+
+def rolling_correlation_matrices(returns, window=60, min_periods=None, block_elements=4_000_000):
+    """
+    Rolling pairwise correlation matrices for N assets, as a (time x N x N) float32 array
+
+    Window sums of x_i x_j, x_i, x_i^2 and pair counts are updated each step by
+    adding the newest row's outer products and removing the oldest, i.e. O(N^2)
+    per step. Steps are processed in blocks (at most block_elements values per
+    accumulator) so the updates stay vectorised with bounded memory.
+    Missing values are handled pairwise, like DataFrame.rolling().corr().
+    Row t holds the correlations of the window ending at returns.index[t].
+    """
+    returns = pd.DataFrame(returns)
+    min_periods = min_periods or window
+    x = returns.to_numpy(dtype=float)
+    # Shifting each column leaves correlations unchanged and keeps sums well conditioned
+    x = x - np.nanmean(x, axis=0)
+    present = ~np.isnan(x)
+    m = present.astype(float)
+    x = np.where(present, x, 0.0)
+    t_total, n = x.shape
+
+    def contributions(rows_x, rows_m):
+        pair_counts = rows_m[:, :, None] * rows_m[:, None, :]
+        sums = rows_x[:, :, None] * rows_m[:, None, :]
+        squares = (rows_x ** 2)[:, :, None] * rows_m[:, None, :]
+        products = rows_x[:, :, None] * rows_x[:, None, :]
+        return np.stack([pair_counts, sums, squares, products])
+
+    correlations = np.full((t_total, n, n), np.nan, dtype=np.float32)
+    state = np.zeros((4, n, n))
+    block = max(1, block_elements // (n * n))
+
+    for start in range(0, t_total, block):
+        end = min(start + block, t_total)
+        delta = contributions(x[start:end], m[start:end])
+
+        # Rows leaving the window over this block
+        old_start, old_end = start - window, end - window
+        if old_end > 0:
+            lo = max(old_start, 0)
+            delta[:, lo - old_start:] -= contributions(x[lo:old_end], m[lo:old_end])
+
+        sums = state[:, None] + np.cumsum(delta, axis=1)
+        state = sums[:, -1]
+
+        counts, s, sq, p = sums
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cov = p - s * s.transpose(0, 2, 1) / counts
+            var = sq - s ** 2 / counts
+            corr = cov / np.sqrt(var * var.transpose(0, 2, 1))
+        corr[counts < min_periods] = np.nan
+        correlations[start:end] = np.clip(corr, -1.0, 1.0)
+
+    return correlations
+
+
+def _dcc_correlations(z, a, b, q_bar):
+    """
+    DCC(1,1) correlation path; the Q recursion is linear so it is solved as a filter
+    """
+    t_total, n = z.shape
+    outer = (z[:, :, None] * z[:, None, :]).reshape(t_total, n * n)
+    drive = np.empty_like(outer)
+    drive[0] = q_bar.ravel()
+    drive[1:] = (1 - a - b) * q_bar.ravel() + a * outer[:-1]
+    q = signal.lfilter([1.0], [1.0, -b], drive, axis=0).reshape(t_total, n, n)
+
+    scale = 1.0 / np.sqrt(np.einsum('tii->ti', q))
+    return q * scale[:, :, None] * scale[:, None, :]
+
+
+def _dcc_neg_log_likelihood(theta, z, q_bar):
+    a, b = theta
+    r = _dcc_correlations(z, a, b, q_bar)
+    _, logdet = np.linalg.slogdet(r)
+    quad = np.einsum('ti,ti->t', z, np.linalg.solve(r, z[:, :, None])[:, :, 0])
+    return 0.5 * np.sum(logdet + quad - np.einsum('ti,ti->t', z, z))
+
+
+def dcc_garch(returns):
+    """
+    Dynamic conditional correlation (Engle 2002) with GARCH(1,1) margins
+
+    Stage one fits fit_garch to each asset; stage two estimates the DCC(1,1)
+    parameters (a, b) on the standardized residuals by maximum likelihood.
+    Uses dates on which every asset has a return.
+    """
+    returns = pd.DataFrame(returns).dropna()
+    assets = list(returns.columns)
+
+    univariate = {}
+    residuals = []
+    for asset in assets:
+        garch = fit_garch(returns[asset])
+        univariate[asset] = {k: garch[k] for k in ['mu', 'omega', 'alpha', 'beta', 'log_likelihood']}
+        residuals.append(garch['standardized_residuals'])
+    z = np.column_stack(residuals)
+    q_bar = np.corrcoef(z, rowvar=False)
+
+    fit = optimize.minimize(_dcc_neg_log_likelihood, [0.02, 0.95], args=(z, q_bar), method='SLSQP',
+                            bounds=[(0.0, 1.0), (0.0, 1.0)],
+                            constraints=[{'type': 'ineq', 'fun': lambda theta: 0.9999 - theta[0] - theta[1]}])
+    a, b = fit.x
+
+    return {
+        'a': a,
+        'b': b,
+        'log_likelihood': -fit.fun,
+        'converged': bool(fit.success),
+        'correlations': _dcc_correlations(z, a, b, q_bar).astype(np.float32),
+        'unconditional_correlation': q_bar,
+        'univariate': univariate,
+        'dates': returns.index,
+        'assets': assets
+    }
+
+
+def correlation_series(correlations, dates, assets, asset, other):
+    """
+    Extract one pair's correlation path from a (time x N x N) array as a Series
+    """
+    i, j = list(assets).index(asset), list(assets).index(other)
+    return pd.Series(correlations[:, i, j], index=dates, name=f'{asset}~{other}')
+
+
+if __name__ == "__main__":
+    from data_collection.market_assets import load_asset_returns, collect_asset_returns, save_asset_returns
+
+    asset_returns = load_asset_returns()
+    if asset_returns is None:
+        asset_returns = collect_asset_returns()
+        if asset_returns is None:
+            sys.exit(1)
+        save_asset_returns(asset_returns)
+
+    rolling = rolling_correlation_matrices(asset_returns, window=60, min_periods=40)
+    print("Latest 60d correlations with BTC:")
+    print(pd.Series(rolling[-1, 0], index=asset_returns.columns))
+
+    dcc = dcc_garch(asset_returns)
+    print(f"\nDCC parameters: a={dcc['a']:.4f}, b={dcc['b']:.4f}")
+    print("Latest DCC correlations with BTC:")
+    print(pd.Series(dcc['correlations'][-1, 0], index=dcc['assets']))
@@ -4,6 +4,10 @@ from scipy import stats
 import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from analysis.kernels import central_moments
+
 def calculate_descriptive_stats(btc_data):
     """
     Calculate comprehensive descriptive statistics for Bitcoin data
@@ -105,6 +109,168 @@ def test_normality(data_series, alpha=0.05):
     return results
 
 
+class RunningMoments:
+    """
+    Running count, mean, std, skewness and kurtosis with O(1) updates
+
+    Keeps central moment sums so observations can be added one at a time or in
+    batches, and removed again for sliding windows. Skewness and kurtosis follow
+    the stats.skew / stats.kurtosis (biased, excess) conventions. Min and max
+    cover every observation ever added.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.m3 = 0.0
+        self.m4 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def _merge(self, n_b, mean_b, m2_b, m3_b, m4_b):
+        n_a = self.n
+        n = n_a + n_b
+        delta = mean_b - self.mean
+        m2_a, m3_a = self.m2, self.m3
+
+        self.mean += delta * n_b / n
+        self.m2 = m2_a + m2_b + delta ** 2 * n_a * n_b / n
+        self.m3 = (m3_a + m3_b + delta ** 3 * n_a * n_b * (n_a - n_b) / n ** 2
+                   + 3 * delta * (n_a * m2_b - n_b * m2_a) / n)
+        self.m4 = (self.m4 + m4_b
+                   + delta ** 4 * n_a * n_b * (n_a ** 2 - n_a * n_b + n_b ** 2) / n ** 3
+                   + 6 * delta ** 2 * (n_a ** 2 * m2_b + n_b ** 2 * m2_a) / n ** 2
+                   + 4 * delta * (n_a * m3_b - n_b * m3_a) / n)
+        self.n = n
+
+    def add(self, x):
+        """Add a single observation"""
+        x = float(x)
+        if np.isnan(x):
+            return
+        self._merge(1, x, 0.0, 0.0, 0.0)
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+
+    def update(self, values):
+        """Add a batch of observations (NaNs are ignored)"""
+        n, mean, m2, m3, m4, low, high = central_moments(values)
+        if n == 0:
+            return
+        self._merge(n, mean, m2, m3, m4)
+        self.min = min(self.min, low)
+        self.max = max(self.max, high)
+
+    def remove(self, x):
+        """Remove a single previously added observation"""
+        x = float(x)
+        if np.isnan(x):
+            return
+        n = self.n
+        if n <= 1:
+            self.__init__()
+            return
+
+        n_a = n - 1
+        mean_a = (n * self.mean - x) / n_a
+        delta = x - mean_a
+        m2_a = self.m2 - delta ** 2 * n_a / n
+        m3_a = self.m3 - delta ** 3 * n_a * (n_a - 1) / n ** 2 + 3 * delta * m2_a / n
+        m4_a = (self.m4 - delta ** 4 * n_a * (n_a ** 2 - n_a + 1) / n ** 3
+                - 6 * delta ** 2 * m2_a / n ** 2 + 4 * delta * m3_a / n)
+
+        self.n, self.mean = n_a, mean_a
+        self.m2, self.m3, self.m4 = max(m2_a, 0.0), m3_a, max(m4_a, 0.0)
+
+    @property
+    def std(self):
+        return np.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else np.nan
+
+    @property
+    def skewness(self):
+        return np.sqrt(self.n) * self.m3 / self.m2 ** 1.5 if self.m2 > 0 else np.nan
+
+    @property
+    def kurtosis(self):
+        return self.n * self.m4 / self.m2 ** 2 - 3 if self.m2 > 0 else np.nan
+
+    def summary(self):
+        """Moment statistics with the same keys as calculate_descriptive_stats"""
+        return {
+            'count': self.n,
+            'mean': self.mean if self.n > 0 else np.nan,
+            'std': self.std,
+            'min': self.min,
+            'max': self.max,
+            'skewness': self.skewness,
+            'kurtosis': self.kurtosis
+        }
+
+    def to_dict(self):
+        return {'n': int(self.n), 'mean': float(self.mean), 'm2': float(self.m2),
+                'm3': float(self.m3), 'm4': float(self.m4),
+                'min': float(self.min), 'max': float(self.max)}
+
+    @classmethod
+    def from_dict(cls, state):
+        moments = cls()
+        for key, value in state.items():
+            setattr(moments, key, value)
+        return moments
+
+
+def test_normality_from_moments(moments, alpha=0.05):
+    """
+    Jarque-Bera and D'Agostino K^2 normality tests from running moments alone
+
+    Uses the same statistics as stats.jarque_bera and stats.normaltest, so the
+    results can be refreshed without revisiting the full return history.
+    """
+    n = moments.n
+    skew = moments.skewness
+    b2 = moments.kurtosis + 3
+    results = {}
+
+    jb_stat = n / 6.0 * (skew ** 2 + (b2 - 3) ** 2 / 4.0)
+    jb_p = stats.chi2.sf(jb_stat, 2)
+    results['jarque_bera'] = {
+        'statistic': jb_stat,
+        'p_value': jb_p,
+        'is_normal': jb_p > alpha
+    }
+
+    # Skewness test (D'Agostino 1970)
+    y = skew * np.sqrt(((n + 1) * (n + 3)) / (6.0 * (n - 2)))
+    beta2 = 3.0 * (n ** 2 + 27 * n - 70) * (n + 1) * (n + 3) / ((n - 2.0) * (n + 5) * (n + 7) * (n + 9))
+    w2 = -1 + np.sqrt(2 * (beta2 - 1))
+    delta = 1 / np.sqrt(0.5 * np.log(w2))
+    a = np.sqrt(2.0 / (w2 - 1))
+    y = y if y != 0 else 1
+    z_skew = delta * np.log(y / a + np.sqrt((y / a) ** 2 + 1))
+
+    # Kurtosis test (Anscombe & Glynn 1983)
+    e = 3.0 * (n - 1) / (n + 1)
+    var_b2 = 24.0 * n * (n - 2) * (n - 3) / ((n + 1) * (n + 1.0) * (n + 3) * (n + 5))
+    x = (b2 - e) / np.sqrt(var_b2)
+    sqrt_beta1 = 6.0 * (n * n - 5 * n + 2) / ((n + 7) * (n + 9)) * np.sqrt((6.0 * (n + 3) * (n + 5)) / (n * (n - 2) * (n - 3)))
+    a = 6.0 + 8.0 / sqrt_beta1 * (2.0 / sqrt_beta1 + np.sqrt(1 + 4.0 / sqrt_beta1 ** 2))
+    term1 = 1 - 2 / (9.0 * a)
+    denom = 1 + x * np.sqrt(2 / (a - 4.0))
+    term2 = np.sign(denom) * ((1 - 2.0 / a) / abs(denom)) ** (1 / 3.0) if denom != 0 else np.nan
+    z_kurt = (term1 - term2) / np.sqrt(2 / (9.0 * a))
+
+    k2 = z_skew ** 2 + z_kurt ** 2
+    k2_p = stats.chi2.sf(k2, 2)
+    results['dagostino'] = {
+        'statistic': k2,
+        'p_value': k2_p,
+        'is_normal': k2_p > alpha
+    }
+
+    return results
+
+
 if __name__ == "__main__":
     # Project paths
     project_root = Path(__file__).resolve().parents[2]
@@ -1,5 +1,6 @@
 # File: src/analysis/distribution_analysis.py
 
+import bisect
 import pandas as pd
 import numpy as np
 from scipy import stats
@@ -69,4 +70,133 @@ def fit_alternative_distributions(bitcoin_returns):
             'bic': bic
         }
     
-    return results
\ No newline at end of file
+    return results
+
+
+def _window_power_sums(x, window):
+    """
+    Sliding-window power sums (orders 1-4), each step adding the newest
+    observation and removing the oldest via differences of running sums
+    """
+    shift = np.median(x)
+    d = x - shift
+    sums = []
+    for order in range(1, 5):
+        running = np.concatenate([[0.0], np.cumsum(d ** order)])
+        sums.append(running[window:] - running[:-window])
+    return shift, sums
+
+
+def rolling_moments(bitcoin_returns, window=252):
+    """
+    Rolling mean, std, skewness and excess kurtosis from running moment sums
+
+    Matches pandas/scipy conventions: std uses ddof=1, skewness and kurtosis
+    are the biased (population) estimators returned by stats.skew/stats.kurtosis.
+    """
+    returns = pd.Series(bitcoin_returns).dropna()
+    x = returns.to_numpy(dtype=float)
+    if len(x) < window:
+        return pd.DataFrame(columns=['mean', 'std', 'skewness', 'kurtosis'])
+
+    shift, (s1, s2, s3, s4) = _window_power_sums(x, window)
+    n = float(window)
+    m1 = s1 / n
+    m2 = np.maximum(s2 / n - m1 ** 2, 0.0)
+    m3 = s3 / n - 3 * m1 * s2 / n + 2 * m1 ** 3
+    m4 = s4 / n - 4 * m1 * s3 / n + 6 * m1 ** 2 * s2 / n - 3 * m1 ** 4
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        skewness = m3 / m2 ** 1.5
+        kurtosis = m4 / m2 ** 2 - 3
+
+    return pd.DataFrame({
+        'mean': m1 + shift,
+        'std': np.sqrt(m2 * n / (n - 1)),
+        'skewness': skewness,
+        'kurtosis': kurtosis
+    }, index=returns.index[window - 1:])
+
+
+def hill_tail_index(bitcoin_returns, tail_fraction=0.05, tail='left'):
+    """
+    Hill estimator of the tail index (alpha) for one tail of the returns
+    """
+    x = np.asarray(pd.Series(bitcoin_returns).dropna(), dtype=float)
+    k = int(len(x) * tail_fraction)
+    x = -x if tail == 'left' else (np.abs(x) if tail == 'both' else x)
+    x = np.sort(x)[::-1]
+
+    if k < 2 or k >= len(x) or x[k] <= 0:
+        return np.nan
+    return 1.0 / np.mean(np.log(x[:k] / x[k]))
+
+
+def rolling_distribution_analysis(bitcoin_returns, window=252, step=1, distribution='t',
+                                  fit_every=None, tail_fraction=0.05, tail='left'):
+    """
+    Rolling skewness, kurtosis, Hill tail index and fitted distribution parameters
+
+    The window slides one observation at a time: moments come from running
+    power sums, tail observations are kept in a sorted window (one insert and
+    one delete per step) and every MLE fit is warm-started from the previous
+    window's parameters. Results are reported every `step` observations and the
+    distribution is refitted every `fit_every` observations (defaults to step).
+    """
+    returns = pd.Series(bitcoin_returns).dropna()
+    x = returns.to_numpy(dtype=float)
+    n = len(x)
+    fit_every = fit_every or step
+
+    moments = rolling_moments(returns, window)
+    if len(moments) == 0:
+        return moments
+
+    # Tail values ordered largest first are read from the end of a sorted list
+    tail_values = -x if tail == 'left' else (np.abs(x) if tail == 'both' else x)
+    sorted_window = sorted(tail_values[:window])
+    k = int(window * tail_fraction)
+
+    dist = getattr(stats, distribution) if distribution else None
+    params = None
+    param_names = None
+    last_fit_offset = 0
+    if dist is not None:
+        shapes = dist.shapes.split(', ') if dist.shapes else []
+        param_names = [f'{distribution}_{p}' for p in shapes + ['loc', 'scale']]
+
+    records = []
+    for end in range(window, n + 1):
+        if end > window:
+            # Slide: drop the oldest observation, insert the newest
+            del sorted_window[bisect.bisect_left(sorted_window, tail_values[end - window - 1])]
+            bisect.insort(sorted_window, tail_values[end - 1])
+
+        offset = end - window
+        # Refit on its own schedule, independent of which windows are reported
+        if dist is not None and (params is None or offset - last_fit_offset >= fit_every):
+            sample = x[offset:end]
+            if params is None:
+                params = dist.fit(sample)
+            else:
+                params = dist.fit(sample, *params[:-2], loc=params[-2], scale=params[-1])
+            last_fit_offset = offset
+
+        if offset % step != 0 and end != n:
+            continue
+
+        record = {'date': returns.index[end - 1]}
+
+        top = np.asarray(sorted_window[-(k + 1):])
+        if k >= 2 and top[0] > 0:
+            record['hill_tail_index'] = 1.0 / np.mean(np.log(top[1:] / top[0]))
+        else:
+            record['hill_tail_index'] = np.nan
+
+        if dist is not None:
+            record.update(zip(param_names, params))
+
+        records.append(record)
+
+    rolling = pd.DataFrame(records).set_index('date')
+    return moments.loc[rolling.index].join(rolling)
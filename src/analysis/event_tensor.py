@@ -0,0 +1,295 @@
+# File: src/analysis/event_tensor.py
+
+import io
+import json
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from analysis.kernels import ewma_variance, rolling_std
+
+FEATURES = ('return', 'abs_return', 'volatility_close', 'volatility_ewma',
+            'volatility_parkinson', 'volatility_garman_klass')
+AXES = ('event', 'asset', 'offset', 'feature')
+
+DEFAULT_PATH = Path(__file__).resolve().parents[2] / 'data' / 'processed' / 'event_tensor.npy'
+DEFAULT_ASSET = 'BTC-USD'
+
+
+def asset_features(frame, window=30, ewma_lambda=0.94):
+    """
+    Daily return features and volatility estimators for one asset
+
+    frame needs Daily_Return or Close; Parkinson and Garman-Klass also need
+    High, Low and Open and are NaN without them. Volatilities are daily (not
+    annualised) and computed on the asset's own observations, so assets that
+    do not trade at weekends are not diluted by empty days.
+    """
+    returns = frame['Daily_Return'] if 'Daily_Return' in frame else frame['Close'].pct_change()
+    frame = frame[returns.notna()]
+    returns = returns.dropna()
+
+    features = pd.DataFrame(index=returns.index, columns=list(FEATURES), dtype=float)
+    features['return'] = returns
+    features['abs_return'] = returns.abs()
+    features['volatility_close'] = rolling_std(returns, window)
+    features['volatility_ewma'] = np.sqrt(ewma_variance(returns.to_numpy() ** 2, ewma_lambda))
+
+    if {'High', 'Low', 'Open', 'Close'} <= set(frame.columns):
+        log_hl = np.log(frame['High'] / frame['Low'])
+        log_co = np.log(frame['Close'] / frame['Open'])
+        parkinson = (log_hl ** 2 / (4 * np.log(2))).rolling(window).mean()
+        garman_klass = (0.5 * log_hl ** 2 - (2 * np.log(2) - 1) * log_co ** 2).rolling(window).mean()
+        features['volatility_parkinson'] = np.sqrt(parkinson)
+        features['volatility_garman_klass'] = np.sqrt(garman_klass.clip(lower=0))
+    return features
+
+
+def asset_frames(btc_data, asset_returns=None):
+    """
+    Bitcoin OHLC data plus the return-only columns of load_asset_returns, keyed by ticker
+    """
+    frames = {DEFAULT_ASSET: btc_data}
+    if asset_returns is not None:
+        for ticker in asset_returns.columns:
+            if ticker not in frames:
+                frames[ticker] = asset_returns[ticker].to_frame('Daily_Return')
+    return frames
+
+
+def feature_panel(frames, window=30, ewma_lambda=0.94):
+    """
+    (days x assets x features) array on a daily calendar covering every asset
+
+    Returns the calendar, the array and the asset names; days without an
+    observation for an asset are NaN.
+    """
+    features = {name: asset_features(frame, window, ewma_lambda) for name, frame in frames.items()}
+    for table in features.values():
+        table.index = table.index.normalize()
+    start = min(table.index.min() for table in features.values())
+    end = max(table.index.max() for table in features.values())
+    calendar = pd.date_range(start, end, freq='D')
+
+    values = np.full((len(calendar), len(features), len(FEATURES)), np.nan)
+    for i, table in enumerate(features.values()):
+        table = table[~table.index.duplicated(keep='last')]
+        values[:, i, :] = table.reindex(calendar).to_numpy()
+    return calendar, values, list(features)
+
+
+def gather_event_windows(values, calendar, event_dates, offsets):
+    """
+    (events x assets x offsets x features) windows around event dates in one gather
+
+    The panel is padded with NaN rows at both ends and every (event, offset)
+    row index is clipped into the padding, so windows running off the data
+    (or events outside it) come back NaN-padded without any per-event slicing.
+    """
+    offsets = np.asarray(list(offsets), dtype=np.int64)
+    pad = max(int(np.abs(offsets).max()), 1)
+    blank = np.full((pad,) + values.shape[1:], np.nan, dtype=values.dtype)
+    padded = np.concatenate([blank, values, blank])
+
+    days = ((pd.DatetimeIndex(event_dates).normalize() - calendar[0]) // pd.Timedelta(days=1)).to_numpy()
+    rows = np.clip(days[:, None] + offsets[None, :] + pad, 0, len(padded) - 1)
+    return np.ascontiguousarray(padded[rows].transpose(0, 2, 1, 3))
+
+
+def _sidecar_path(path):
+    return Path(path).with_suffix('.json')
+
+
+def _read_metadata(path):
+    if not Path(path).exists() or not _sidecar_path(path).exists():
+        return None
+    with open(_sidecar_path(path)) as f:
+        return json.load(f)
+
+
+def load_event_tensor(path=None, mmap_mode='r'):
+    """
+    Memory-mapped event tensor and its metadata sidecar, or (None, None) if missing
+    """
+    path = Path(path or DEFAULT_PATH)
+    metadata = _read_metadata(path)
+    if metadata is None:
+        return None, None
+    return np.load(path, mmap_mode=mmap_mode), metadata
+
+
+def _write_metadata(path, tensor_shape, dtype, events, assets, offsets, calendar, window, ewma_lambda):
+    metadata = {
+        'shape': list(tensor_shape),
+        'dtype': np.dtype(dtype).str,
+        'axes': list(AXES),
+        'event_id': [int(e) for e in events['event_id']],
+        'event_date': [d.strftime('%Y-%m-%d') for d in events['date']],
+        'assets': assets,
+        'offsets': [int(k) for k in offsets],
+        'features': list(FEATURES),
+        'window': window,
+        'ewma_lambda': ewma_lambda,
+        'data_start': calendar[0].strftime('%Y-%m-%d'),
+        'data_end': calendar[-1].strftime('%Y-%m-%d'),
+        'updated': pd.Timestamp.now().isoformat(timespec='seconds')
+    }
+    with open(_sidecar_path(path), 'w') as f:
+        json.dump(metadata, f, indent=2)
+    return metadata
+
+
+def _append_rows(path, rows):
+    """
+    Append rows along the first axis of a C-order .npy file in place
+
+    NumPy pads .npy headers so the first dimension can grow without changing
+    the header length; the header is rewritten and the rows written at the end.
+    Falls back to rewriting the file when the header would not fit.
+    """
+    with open(path, 'r+b') as f:
+        version = np.lib.format.read_magic(f)
+        read_header, write_header = {
+            (1, 0): (np.lib.format.read_array_header_1_0, np.lib.format.write_array_header_1_0),
+            (2, 0): (np.lib.format.read_array_header_2_0, np.lib.format.write_array_header_2_0)
+        }.get(version, (None, None))
+        if read_header is not None:
+            shape, fortran_order, dtype = read_header(f)
+            data_offset = f.tell()
+            header = io.BytesIO()
+            write_header(header, {'descr': np.lib.format.dtype_to_descr(dtype), 'fortran_order': False,
+                                  'shape': (shape[0] + len(rows),) + shape[1:]})
+            if (not fortran_order and dtype == rows.dtype and shape[1:] == rows.shape[1:]
+                    and header.tell() == data_offset):
+                f.seek(0)
+                f.write(header.getvalue())
+                f.seek(0, os.SEEK_END)
+                f.write(np.ascontiguousarray(rows).tobytes())
+                return
+
+    # Header length changed (or layout differs): rewrite the whole file
+    existing = np.load(path)
+    np.save(path, np.concatenate([existing, rows.astype(existing.dtype)]))
+
+
+def write_arrow(tensor, metadata, path):
+    """
+    Write the tensor as an Arrow IPC file: one row per event with a fixed-shape tensor column
+
+    Requires pyarrow; the file can be memory-mapped with pyarrow.memory_map.
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ImportError("Arrow export requires the 'pyarrow' package: pip install pyarrow")
+
+    windows = pa.FixedShapeTensorArray.from_numpy_ndarray(np.ascontiguousarray(tensor))
+    table = pa.table({
+        'event_id': metadata['event_id'],
+        'event_date': pd.to_datetime(metadata['event_date']).to_numpy(),
+        'window': windows
+    })
+    schema_metadata = {key: json.dumps(metadata[key]) for key in ('axes', 'assets', 'offsets', 'features')}
+    table = table.replace_schema_metadata(schema_metadata)
+    with pa.OSFile(str(path), 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def export_event_tensor(frames, events_data, path=None, offsets=range(-30, 31), window=30,
+                        ewma_lambda=0.94, dtype=np.float64, arrow=False):
+    """
+    Build the full (events x assets x offsets x features) tensor and write it as .npy plus a JSON sidecar
+
+    frames maps asset names to price frames (see asset_frames). With
+    arrow=True an Arrow IPC copy is written next to the .npy.
+    Returns the tensor and its metadata.
+    """
+    path = Path(path or DEFAULT_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    events = events_data.sort_values('event_id')
+    offsets = list(offsets)
+
+    calendar, values, assets = feature_panel(frames, window, ewma_lambda)
+    tensor = gather_event_windows(values, calendar, events['date'], offsets).astype(dtype)
+    np.save(path, tensor)
+    metadata = _write_metadata(path, tensor.shape, tensor.dtype, events, assets, offsets, calendar,
+                               window, ewma_lambda)
+    if arrow:
+        write_arrow(tensor, metadata, path.with_suffix('.arrow'))
+
+    print(f"Event tensor saved to {path}: {' x '.join(map(str, tensor.shape))} ({', '.join(AXES)})")
+    return tensor, metadata
+
+
+def update_event_tensor(frames, events_data, path=None, offsets=range(-30, 31), window=30,
+                        ewma_lambda=0.94, dtype=np.float64, arrow=False):
+    """
+    Bring a saved event tensor up to date without rebuilding it
+
+    Rows are gathered only for events not yet in the file (appended in place)
+    and for stored events whose windows reach past the previous data end
+    (rewritten in place through a memory map); every other row is untouched.
+    Falls back to export_event_tensor when there is no file or the assets,
+    offsets, features or estimator settings differ. Events removed from
+    events_data keep their rows. Returns the metadata and the updated event ids.
+    """
+    path = Path(path or DEFAULT_PATH)
+    metadata = _read_metadata(path)
+    offsets = list(offsets)
+
+    calendar, values, assets = feature_panel(frames, window, ewma_lambda)
+    if metadata is None or (metadata['assets'], metadata['offsets'], metadata['features'],
+                            metadata['window'], metadata['ewma_lambda'], metadata['dtype']) != \
+            (assets, offsets, list(FEATURES), window, ewma_lambda, np.dtype(dtype).str):
+        _, metadata = export_event_tensor(frames, events_data, path, offsets, window, ewma_lambda, dtype, arrow)
+        return metadata, list(metadata['event_id'])
+
+    stored = pd.DataFrame({'event_id': metadata['event_id'],
+                           'date': pd.to_datetime(metadata['event_date'])})
+    new_events = events_data[~events_data['event_id'].isin(stored['event_id'])].sort_values('event_id')
+    data_end = pd.Timestamp(metadata['data_end'])
+    stale = stored[(stored['date'] + pd.Timedelta(days=max(offsets)) > data_end) & (calendar[-1] > data_end)]
+
+    if len(stale) > 0:
+        rows = np.load(path, mmap_mode='r+')
+        rows[stale.index.to_numpy()] = gather_event_windows(values, calendar, stale['date'], offsets)
+        rows.flush()
+        del rows
+    if len(new_events) > 0:
+        _append_rows(path, gather_event_windows(values, calendar, new_events['date'], offsets).astype(dtype))
+
+    events = pd.concat([stored, new_events[['event_id', 'date']]], ignore_index=True)
+    shape = (len(events), len(assets), len(offsets), len(FEATURES))
+    metadata = _write_metadata(path, shape, dtype, events, assets, offsets, calendar, window, ewma_lambda)
+    if arrow:
+        write_arrow(np.load(path, mmap_mode='r'), metadata, path.with_suffix('.arrow'))
+
+    updated = list(stale['event_id']) + list(new_events['event_id'])
+    print(f"Event tensor updated: {len(new_events)} events appended, {len(stale)} refreshed")
+    return metadata, updated
+
+
+if __name__ == "__main__":
+    from data_collection.bitcoin_prices import load_bitcoin_data
+    from data_collection.market_assets import load_asset_returns
+    from data_collection.market_events import create_events_database
+
+    btc_data = load_bitcoin_data()
+    events_data = create_events_database()
+    frames = asset_frames(btc_data, load_asset_returns())
+
+    # Build from all but the last five events, then add them incrementally
+    export_event_tensor(frames, events_data[events_data['event_id'] <= events_data['event_id'].max() - 5])
+    update_event_tensor(frames, events_data)
+
+    tensor, metadata = load_event_tensor()
+    mean_path = np.nanmean(tensor[:, 0, :, FEATURES.index('abs_return')], axis=0)
+    print(f"Mean Bitcoin abs return, day -1 / 0 / +1: "
+          f"{mean_path[metadata['offsets'].index(-1)]:.4f} / {mean_path[metadata['offsets'].index(0)]:.4f} / "
+          f"{mean_path[metadata['offsets'].index(1)]:.4f}")
@@ -3,43 +3,59 @@ import numpy as np
 from scipy import stats
 from datetime import timedelta
 import matplotlib.pyplot as plt
+import sys
 from pathlib import Path
 
-def event_impact_analysis(btc_data, events_data, window_days=10):
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from analysis.kernels import window_moments
+
+
+def _pooled_t_test(n_a, mean_a, ss_a, n_b, mean_b, ss_b, min_size=3):
+    """
+    Pooled two-sample t-test (as stats.ttest_ind) from window counts, means and squared deviations
+
+    Pairs where either side has min_size or fewer observations get NaN.
+    """
+    dof = n_a + n_b - 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pooled = (ss_a + ss_b) / dof
+        t_stat = (mean_a - mean_b) / np.sqrt(pooled * (1 / n_a + 1 / n_b))
+    testable = (n_a > min_size) & (n_b > min_size)
+    t_stat = np.where(testable, t_stat, np.nan)
+    p_value = np.where(testable, 2 * stats.t.sf(np.abs(t_stat), np.where(testable, dof, 1)), np.nan)
+    return t_stat, p_value
+
+def event_impact_analysis(btc_data, events_data, window_days=10, plot=True):
     """
     Analyze the impact of events on Bitcoin volatility using t-tests
     """
     results = []
+    if not btc_data.index.is_monotonic_increasing:
+        btc_data = btc_data.sort_index()
 
-    for idx, event in events_data.iterrows():
-        event_date = event['date']
+    # Row bounds of every event's before/after window, scanned in one kernel call
+    dates = events_data['date']
+    index = btc_data.index
+    lo = np.stack([index.searchsorted((dates - timedelta(days=window_days)).to_numpy(), side='left'),
+                   index.searchsorted((dates + timedelta(days=1)).to_numpy(), side='left')])
+    hi = np.stack([index.searchsorted((dates - timedelta(days=1)).to_numpy(), side='right'),
+                   index.searchsorted((dates + timedelta(days=window_days)).to_numpy(), side='right')])
+    n, mean, sum_sq_dev = window_moments(btc_data['Abs_Return'].to_numpy(dtype=float), lo, hi)
+    t_stats, p_values = _pooled_t_test(n[0], mean[0], sum_sq_dev[0], n[1], mean[1], sum_sq_dev[1])
 
-        # Define before and after periods
+    for i, (idx, event) in enumerate(events_data.iterrows()):
+        event_date = event['date']
         before_start = event_date - timedelta(days=window_days)
-        before_end = event_date - timedelta(days=1)
-        after_start = event_date + timedelta(days=1)
         after_end = event_date + timedelta(days=window_days)
 
-        # Get volatility data for before and after periods
-        before_data = btc_data[(btc_data.index >= before_start) &
-                               (btc_data.index <= before_end)]['Abs_Return'].dropna()
-        after_data = btc_data[(btc_data.index >= after_start) &
-                              (btc_data.index <= after_end)]['Abs_Return'].dropna()
-
         # Even if some data exists, continue
-        if len(before_data) == 0 and len(after_data) == 0:
+        if n[0, i] == 0 and n[1, i] == 0:
             continue
 
-        # Fill missing data with empty Series to avoid errors
-        before_mean = before_data.mean() if len(before_data) > 0 else np.nan
-        after_mean = after_data.mean() if len(after_data) > 0 else np.nan 
-
-        # Perform t-test only if both have enough data
-        if len(before_data) > 3 and len(after_data) > 3:
-            t_stat, p_value = stats.ttest_ind(before_data, after_data)
-            significant = p_value < 0.05
-        else:
-            t_stat, p_value, significant = np.nan, np.nan, False
+        before_mean, after_mean = mean[0, i], mean[1, i]
+        t_stat, p_value = t_stats[i], p_values[i]
+        significant = p_value < 0.05
 
         # Handle both "type" and "event_type" column names
         if 'type' in event.index:
@@ -53,6 +69,7 @@ def event_impact_analysis(btc_data, events_data, window_days=10):
             'event_id': event['event_id'],
             'event': event['event'],
             'event_type': event_type,
+            'price_impact': event['price_impact'] if 'price_impact' in event.index else "unknown",
             'severity': event['severity'],
             'before_volatility_mean': before_mean,
             'after_volatility_mean': after_mean,
@@ -64,7 +81,7 @@ def event_impact_analysis(btc_data, events_data, window_days=10):
 
         # Plot the event impact
         window_data = btc_data[(btc_data.index >= before_start) & (btc_data.index <= after_end)]['Abs_Return']
-        if len(window_data) > 0:
+        if plot and len(window_data) > 0:
             plt.figure(figsize=(10, 5))
             plt.plot(window_data.index, window_data.values, label='Abs_Return', color='blue', alpha=0.7)
             plt.axvline(event_date, color='red', linestyle='--', label='Event Date')
@@ -82,29 +99,366 @@ def event_impact_analysis(btc_data, events_data, window_days=10):
     return pd.DataFrame(results)
 
 
-def correlation_analysis(btc_data, events_data, window_days=10):
+def update_event_impacts(btc_data, events_data, previous_results, new_start, window_days=10, plot=True):
+    """
+    Re-evaluate only the events affected by data from new_start onwards
+
+    An event is affected when its after-window reaches new_start or when it has
+    no stored result yet; every other row of previous_results is kept as is.
+    Returns the merged results and the ids of the re-evaluated events.
+    """
+    new_start = pd.Timestamp(new_start)
+    known_ids = set(previous_results['event_id']) if len(previous_results) > 0 else set()
+
+    touched = events_data['date'] + timedelta(days=window_days) >= new_start
+    unseen = ~events_data['event_id'].isin(known_ids)
+    affected = events_data[touched | unseen]
+    if len(affected) == 0:
+        return previous_results, []
+
+    updated = event_impact_analysis(btc_data, affected, window_days, plot=plot)
+    kept = previous_results[~previous_results['event_id'].isin(affected['event_id'])] if len(previous_results) > 0 else previous_results
+    merged = pd.concat([kept, updated], ignore_index=True).sort_values('event_id').reset_index(drop=True)
+    return merged, affected['event_id'].tolist()
+
+
+def correlation_analysis(btc_data, events_data, window_days=10, event_impacts=None):
     """
     Analyze correlation between event severity and volatility changes
+
+    Pass event_impacts (the output of event_impact_analysis) to reuse
+    existing per-event results instead of recomputing them. Pearson is
+    reported alongside the rank-based Spearman and Kendall coefficients.
     """
-    event_impacts = event_impact_analysis(btc_data, events_data, window_days)
+    if event_impacts is None:
+        event_impacts = event_impact_analysis(btc_data, events_data, window_days, plot=False)
 
     # Drop NaN changes to avoid correlation issues
     valid_impacts = event_impacts.dropna(subset=['volatility_change'])
 
     if len(valid_impacts) > 0:
         correlation = stats.pearsonr(valid_impacts['severity'], valid_impacts['volatility_change'])
+        spearman = stats.spearmanr(valid_impacts['severity'], valid_impacts['volatility_change'])
+        kendall = stats.kendalltau(valid_impacts['severity'], valid_impacts['volatility_change'])
         return {
             'correlation_coefficient': correlation[0],
             'p_value': correlation[1],
-            'significant': correlation[1] < 0.05
+            'significant': correlation[1] < 0.05,
+            'spearman_coefficient': spearman[0],
+            'spearman_p_value': spearman[1],
+            'kendall_tau': kendall[0],
+            'kendall_p_value': kendall[1]
         }
     else:
         return {
             'correlation_coefficient': np.nan,
             'p_value': np.nan,
-            'significant': False
+            'significant': False,
+            'spearman_coefficient': np.nan,
+            'spearman_p_value': np.nan,
+            'kendall_tau': np.nan,
+            'kendall_p_value': np.nan
         }
-    
+
+
+def benjamini_hochberg(p_values):
+    """
+    Benjamini-Hochberg FDR adjusted p-values (q-values); NaNs are left out and kept as NaN
+    """
+    p_values = np.asarray(p_values, dtype=float)
+    q_values = np.full(p_values.shape, np.nan)
+    valid = np.flatnonzero(~np.isnan(p_values))
+    if len(valid) == 0:
+        return q_values
+
+    order = valid[np.argsort(p_values[valid])]
+    ranked = p_values[order] * len(order) / np.arange(1, len(order) + 1)
+    # Step-up: each q-value is the smallest adjusted p-value at or above its rank
+    q_values[order] = np.minimum(np.minimum.accumulate(ranked[::-1])[::-1], 1.0)
+    return q_values
+
+
+def group_event_impacts(event_impacts, by):
+    """
+    Per-group volatility change statistics with group reductions via np.bincount
+
+    Groups are the distinct values of the column(s) in by. For each group:
+    event count, mean and std of volatility_change, share of individually
+    significant events, and a pooled one-sample t-test of the mean change
+    against zero. A one-way ANOVA across the groups is stored in the attrs.
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    valid = event_impacts.dropna(subset=['volatility_change'])
+    keys = valid[by].astype(str)
+    codes, groups = pd.MultiIndex.from_frame(keys).factorize(sort=True)
+    n_groups = len(groups)
+
+    change = valid['volatility_change'].to_numpy(dtype=float)
+    n = np.bincount(codes, minlength=n_groups).astype(float)
+    total = np.bincount(codes, weights=change, minlength=n_groups)
+    total_sq = np.bincount(codes, weights=change ** 2, minlength=n_groups)
+    n_significant = np.bincount(codes, weights=valid['significant'].to_numpy(dtype=float), minlength=n_groups)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = total / n
+        sum_sq_dev = np.maximum(total_sq - n * mean ** 2, 0.0)
+        std = np.sqrt(sum_sq_dev / (n - 1))
+        t_stat = mean / (std / np.sqrt(n))
+    p_value = np.where(n > 1, 2 * stats.t.sf(np.abs(t_stat), np.maximum(n - 1, 1)), np.nan)
+
+    table = pd.DataFrame({
+        'n_events': n.astype(int),
+        'mean_volatility_change': mean,
+        'std_volatility_change': std,
+        'share_significant': n_significant / n,
+        't_statistic': t_stat,
+        'p_value': p_value
+    }, index=groups)
+
+    # One-way ANOVA from the same group sums: between vs within sum of squares
+    grand_mean = change.mean()
+    ss_between = np.sum(n * (mean - grand_mean) ** 2)
+    ss_within = np.sum(sum_sq_dev)
+    df_between, df_within = n_groups - 1, len(change) - n_groups
+    if df_between > 0 and df_within > 0 and ss_within > 0:
+        f_stat = (ss_between / df_between) / (ss_within / df_within)
+        table.attrs['anova_f_statistic'] = f_stat
+        table.attrs['anova_p_value'] = stats.f.sf(f_stat, df_between, df_within)
+    return table
+
+
+def stratified_event_analysis(event_impacts, groupings=('event_type', 'price_impact', ('event_type', 'price_impact')),
+                              alpha=0.05):
+    """
+    Event impacts aggregated per category, per price direction and per combination
+
+    Each grouping (a column name or a list of columns) is summarised with
+    group_event_impacts; the Benjamini-Hochberg correction is applied across
+    every group of every grouping, so 'significant' controls the false
+    discovery rate at alpha over the whole table.
+    """
+    tables = []
+    anova = {}
+    for by in groupings:
+        table = group_event_impacts(event_impacts, by)
+        name = '*'.join([by] if isinstance(by, str) else by)
+        anova[name] = dict(table.attrs)
+        table.index = [' & '.join(key) for key in table.index]
+        table.index.name = 'group'
+        tables.append(table.assign(grouping=name).set_index('grouping', append=True).swaplevel())
+
+    result = pd.concat(tables)
+    result['q_value'] = benjamini_hochberg(result['p_value'])
+    result['significant'] = result['q_value'] < alpha
+    result.attrs['anova'] = anova
+    return result
+
+
+def event_window_grid(btc_data, events_data, windows=range(1, 61)):
+    """
+    Before/after Abs_Return statistics for every event and window length in one pass
+
+    Abs_Return is laid on a daily calendar and every (event, window) cell is
+    reduced by the window_moments kernel, matching the calendar-day windows of
+    event_impact_analysis without slicing the data per event or per window.
+    Returns a dict of (events x windows) arrays plus the windows and event ids.
+    """
+    windows = np.asarray(list(windows))
+    abs_returns = btc_data['Abs_Return'].dropna()
+    calendar = pd.date_range(abs_returns.index.min(), abs_returns.index.max(), freq='D')
+    values = abs_returns.groupby(level=0).mean().reindex(calendar).to_numpy()
+
+    # Day offset of each event in the calendar; window_moments clips windows to the data range
+    offsets = ((events_data['date'] - calendar[0]) // pd.Timedelta(days=1)).to_numpy()[:, None]
+
+    n_before, before_mean, ss_before = window_moments(values, offsets - windows, offsets)
+    n_after, after_mean, ss_after = window_moments(values, offsets + 1, offsets + windows + 1)
+    t_stat, p_value = _pooled_t_test(n_before, before_mean, ss_before, n_after, after_mean, ss_after)
+
+    return {
+        'windows': windows,
+        'event_id': events_data['event_id'].to_numpy(),
+        'before_volatility_mean': before_mean,
+        'after_volatility_mean': after_mean,
+        'volatility_change': after_mean - before_mean,
+        't_statistic': t_stat,
+        'p_value': p_value,
+        'significant': p_value < 0.05
+    }
+
+
+def _event_design(events_data, min_category_size=5):
+    """
+    Regression design: intercept, severity, price direction, centred year, category dummies
+
+    Categories with fewer than min_category_size events are pooled into 'other'
+    so bootstrap resamples keep every dummy estimable.
+    """
+    direction = events_data['price_impact'].map({'positive': 1.0, 'negative': -1.0}).fillna(0.0)
+    year = events_data['year'] if 'year' in events_data else events_data['date'].dt.year
+    columns = {
+        'intercept': np.ones(len(events_data)),
+        'severity': events_data['severity'].to_numpy(dtype=float),
+        'direction': direction.to_numpy(),
+        'year': (year - year.mean()).to_numpy(dtype=float)
+    }
+
+    # Handle both "type" and "event_type" column names
+    category_column = 'event_type' if 'event_type' in events_data else 'type' if 'type' in events_data else None
+    if category_column is not None:
+        categories = events_data[category_column].astype(str)
+        counts = categories.value_counts()
+        categories = categories.where(categories.map(counts) >= min_category_size, 'other')
+        for category in sorted(categories.unique())[1:]:
+            columns[f'type_{category}'] = (categories == category).to_numpy(dtype=float)
+
+    return pd.DataFrame(columns, index=events_data.index)
+
+
+def _weighted_median(values, weights):
+    """
+    Median along the last axis with frequency weights (equals np.median for unit weights)
+    """
+    order = np.argsort(values, axis=-1)
+    values = np.take_along_axis(values, order, axis=-1)
+    cumulative = np.cumsum(np.take_along_axis(weights, order, axis=-1), axis=-1)
+    half = cumulative[..., -1:] / 2
+    lower = np.argmax(cumulative >= half, axis=-1)[..., None]
+    upper = np.argmax(cumulative > half, axis=-1)[..., None]
+    # An exact split between two observations averages them, as np.median does
+    tie = np.take_along_axis(cumulative, lower, axis=-1) == half
+    median = np.where(tie, (np.take_along_axis(values, lower, axis=-1) +
+                            np.take_along_axis(values, upper, axis=-1)) / 2,
+                      np.take_along_axis(values, lower, axis=-1))
+    return median[..., 0]
+
+
+def huber_regression(x, y, sample_weight=None, c=1.345, n_iter=50, tol=1e-8, ridge=1e-10):
+    """
+    Huber M-estimation by iteratively reweighted least squares, batched over responses
+
+    x is one (n, p) design shared by every response in y (..., n); sample_weight
+    (broadcastable to y) holds frequency weights, so bootstrap resamples are
+    expressed as draw counts on the original rows and all fits reduce to a few
+    large matrix products. The residual scale is fixed at the normalised
+    (weighted) MAD of the least-squares fit, and only regressions that have
+    not converged keep iterating. Returns the coefficients (..., p).
+    """
+    x = np.asarray(x, dtype=float)
+    n, p = x.shape
+    y = np.asarray(y, dtype=float)
+    weights = np.ones(y.shape) if sample_weight is None else np.asarray(sample_weight, dtype=float)
+    y, weights = np.broadcast_arrays(y, weights)
+    batch_shape = y.shape[:-1]
+    y = y.reshape(-1, n)
+    weights = weights.reshape(-1, n)
+
+    outer = (x[:, :, None] * x[:, None, :]).reshape(n, p * p)
+    ridge = ridge * np.eye(p)
+
+    def weighted_fit(idx, robust_weights):
+        total_weights = weights[idx] * robust_weights
+        # A tiny ridge keeps resamples that miss a category solvable
+        xtx = (total_weights @ outer).reshape(len(idx), p, p) + ridge
+        xty = (total_weights * y[idx]) @ x
+        beta = np.linalg.solve(xtx, xty[..., None])[..., 0]
+        return beta, y[idx] - beta @ x.T
+
+    active = np.arange(len(y))
+    beta, residuals = weighted_fit(active, 1.0)
+    scale = np.maximum(1.4826 * _weighted_median(np.abs(residuals), weights), 1e-12)[:, None]
+
+    for _ in range(n_iter):
+        scaled = np.abs(residuals) / scale[active]
+        robust_weights = np.where(scaled <= c, 1.0, c / np.maximum(scaled, 1e-12))
+        new_beta, residuals = weighted_fit(active, robust_weights)
+
+        # Converged when no coefficient moves by more than tol relative to the residual scale
+        change = np.max(np.abs(new_beta - beta[active]), axis=1) / scale[active, 0]
+        beta[active] = new_beta
+        keep = change >= tol
+        active, residuals = active[keep], residuals[keep]
+        if len(active) == 0:
+            break
+
+    return beta.reshape(batch_shape + (p,))
+
+
+def _rank_pearson(a, b):
+    """
+    Pearson correlation along the last axis; applied to ranks it gives Spearman
+    """
+    a = a - a.mean(axis=-1, keepdims=True)
+    b = b - b.mean(axis=-1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.sum(a * b, axis=-1) / np.sqrt(np.sum(a ** 2, axis=-1) * np.sum(b ** 2, axis=-1))
+
+
+def severity_impact_surface(btc_data, events_data, windows=range(1, 61), n_bootstrap=1000,
+                            confidence=0.95, seed=None):
+    """
+    Severity-impact sensitivity across before/after window lengths, without plotting
+
+    For each window length: Pearson, Spearman and Kendall correlations between
+    severity and volatility change, and a Huber robust regression of the change
+    on severity, price direction, year and event category. Bootstrap bands
+    resample events once and reuse the same draws for every window. Events are
+    restricted to those with a volatility change at every window length, so the
+    surface compares the same sample throughout.
+    Returns a DataFrame indexed by window length.
+    """
+    grid = event_window_grid(btc_data, events_data, windows)
+    change = grid['volatility_change']
+    complete = ~np.isnan(change).any(axis=1)
+    change = change[complete]
+    events = events_data[complete]
+    design = _event_design(events)
+    x = design.to_numpy()
+    severity = events['severity'].to_numpy(dtype=float)
+    n_events, n_windows = change.shape
+
+    rows = []
+    for j, window in enumerate(grid['windows']):
+        pearson = stats.pearsonr(severity, change[:, j])
+        spearman = stats.spearmanr(severity, change[:, j])
+        kendall = stats.kendalltau(severity, change[:, j])
+        rows.append({
+            'window_days': window,
+            'n_events': n_events,
+            'share_significant': np.mean(grid['significant'][complete, j]),
+            'pearson': pearson[0],
+            'pearson_p_value': pearson[1],
+            'spearman': spearman[0],
+            'spearman_p_value': spearman[1],
+            'kendall_tau': kendall[0],
+            'kendall_p_value': kendall[1]
+        })
+    surface = pd.DataFrame(rows).set_index('window_days')
+
+    # Robust regression for all windows at once, sharing the event design
+    coefficients = huber_regression(x, change.T)
+    for k, name in enumerate(design.columns[1:], start=1):
+        surface[f'coef_{name}'] = coefficients[:, k]
+
+    # Bootstrap: one set of resampled events shared by every window
+    rng = np.random.default_rng(seed)
+    draws = rng.integers(0, n_events, size=(n_bootstrap, n_events))
+    severity_ranks = stats.rankdata(severity[draws], axis=-1)[:, None, :]
+    change_ranks = stats.rankdata(np.moveaxis(change[draws], -1, 1), axis=-1)
+    boot_spearman = _rank_pearson(severity_ranks, change_ranks)
+
+    # The regression sees each resample as draw counts on the original events
+    offsets = np.arange(n_bootstrap)[:, None] * n_events
+    counts = np.bincount((draws + offsets).ravel(), minlength=n_bootstrap * n_events).reshape(n_bootstrap, n_events)
+    boot_coefficients = huber_regression(x, change.T, sample_weight=counts[:, None, :])
+
+    lower, upper = (1 - confidence) / 2, 1 - (1 - confidence) / 2
+    surface['spearman_ci_low'] = np.nanquantile(boot_spearman, lower, axis=0)
+    surface['spearman_ci_high'] = np.nanquantile(boot_spearman, upper, axis=0)
+    surface['coef_severity_ci_low'] = np.quantile(boot_coefficients[..., 1], lower, axis=0)
+    surface['coef_severity_ci_high'] = np.quantile(boot_coefficients[..., 1], upper, axis=0)
+    return surface
+
 
 if __name__ == "__main__":
     # Get project root directory
@@ -137,3 +491,13 @@ if __name__ == "__main__":
     correlation_results = correlation_analysis(btc_data, events_data)
     print("\nCorrelation Results:")
     print(correlation_results)
+
+    # Impacts by event type and price direction, FDR-corrected
+    stratified = stratified_event_analysis(impact_results)
+    print("\nStratified Event Impacts:")
+    print(stratified[['n_events', 'mean_volatility_change', 'p_value', 'q_value', 'significant']])
+
+    # Sensitivity of the severity relationship to the window length
+    surface = severity_impact_surface(btc_data, events_data, seed=42)
+    print("\nSeverity-impact surface (every 10th window):")
+    print(surface.iloc[::10, :8])
@@ -0,0 +1,301 @@
+# File: src/analysis/kernels.py
+
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy import signal
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Windows reduced at once by the NumPy rolling kernel, bounding its temporary memory
+_ROLLING_CHUNK = 65_536
+
+
+# Loop kernels: sequential reference implementations, compiled with Numba when installed
+
+def _loop_garch_variance(eps, omega, alpha, beta, sigma2_0):
+    sigma2 = np.empty(len(eps))
+    if len(eps) == 0:
+        return sigma2
+    sigma2[0] = sigma2_0
+    for t in range(1, len(eps)):
+        sigma2[t] = omega + alpha * eps[t - 1] ** 2 + beta * sigma2[t - 1]
+    return sigma2
+
+
+def _loop_ewma_variance(squared, ewma_lambda):
+    variance = np.empty(len(squared))
+    if len(squared) == 0:
+        return variance
+    variance[0] = squared[0]
+    for t in range(1, len(squared)):
+        variance[t] = ewma_lambda * variance[t - 1] + (1 - ewma_lambda) * squared[t]
+    return variance
+
+
+def _loop_rolling_std(x, window):
+    out = np.full(len(x), np.nan)
+    n, mean, m2 = 0, 0.0, 0.0
+    for t in range(len(x)):
+        value = x[t]
+        if not np.isnan(value):
+            n += 1
+            delta = value - mean
+            mean += delta / n
+            m2 += delta * (value - mean)
+        if t >= window:
+            old = x[t - window]
+            if not np.isnan(old):
+                n -= 1
+                if n == 0:
+                    mean, m2 = 0.0, 0.0
+                else:
+                    delta = old - mean
+                    mean -= delta / n
+                    m2 -= delta * (old - mean)
+        if n == window and window > 1:
+            out[t] = np.sqrt(max(m2, 0.0) / (n - 1))
+    return out
+
+
+def _loop_central_moments(x):
+    n, total = 0, 0.0
+    low, high = np.inf, -np.inf
+    for value in x:
+        if not np.isnan(value):
+            n += 1
+            total += value
+            low = min(low, value)
+            high = max(high, value)
+    if n == 0:
+        return 0, 0.0, 0.0, 0.0, 0.0, low, high
+    mean = total / n
+    m2, m3, m4 = 0.0, 0.0, 0.0
+    for value in x:
+        if not np.isnan(value):
+            d = value - mean
+            m2 += d * d
+            m3 += d * d * d
+            m4 += d * d * d * d
+    return n, mean, m2, m3, m4, low, high
+
+
+def _loop_window_moments(x, lo, hi):
+    n = np.zeros(len(lo))
+    mean = np.full(len(lo), np.nan)
+    sum_sq_dev = np.zeros(len(lo))
+    for i in range(len(lo)):
+        count, total = 0, 0.0
+        for t in range(lo[i], hi[i]):
+            if not np.isnan(x[t]):
+                count += 1
+                total += x[t]
+        n[i] = count
+        if count == 0:
+            continue
+        mean[i] = total / count
+        ss = 0.0
+        for t in range(lo[i], hi[i]):
+            if not np.isnan(x[t]):
+                ss += (x[t] - mean[i]) ** 2
+        sum_sq_dev[i] = ss
+    return n, mean, sum_sq_dev
+
+
+# NumPy kernels: vectorised equivalents used when Numba is not installed
+
+def _numpy_garch_variance(eps, omega, alpha, beta, sigma2_0):
+    if len(eps) == 0:
+        return np.empty(0)
+    x = np.empty(len(eps))
+    x[0] = sigma2_0
+    x[1:] = omega + alpha * eps[:-1] ** 2
+    return signal.lfilter([1.0], [1.0, -beta], x)
+
+
+def _numpy_ewma_variance(squared, ewma_lambda):
+    if len(squared) == 0:
+        return np.empty(0)
+    tail, _ = signal.lfilter([1 - ewma_lambda], [1.0, -ewma_lambda], squared[1:],
+                             zi=[ewma_lambda * squared[0]])
+    return np.concatenate([squared[:1], tail])
+
+
+def _numpy_rolling_std(x, window):
+    out = np.full(len(x), np.nan)
+    if window < 2 or len(x) < window:
+        return out
+    windows = sliding_window_view(x, window)
+    for start in range(0, len(windows), _ROLLING_CHUNK):
+        chunk = windows[start:start + _ROLLING_CHUNK]
+        out[window - 1 + start:window - 1 + start + len(chunk)] = chunk.std(axis=1, ddof=1)
+    return out
+
+
+def _numpy_central_moments(x):
+    x = x[~np.isnan(x)]
+    if len(x) == 0:
+        return 0, 0.0, 0.0, 0.0, 0.0, np.inf, -np.inf
+    mean = x.mean()
+    d = x - mean
+    d2 = d * d
+    return len(x), mean, d2.sum(), np.sum(d2 * d), np.sum(d2 * d2), x.min(), x.max()
+
+
+def _numpy_window_moments(x, lo, hi):
+    observed = ~np.isnan(x)
+
+    def cumulative(a):
+        return np.concatenate([[0.0], np.cumsum(a)])
+
+    values = np.where(observed, x, 0.0)
+    sums, squares, counts = cumulative(values), cumulative(values * values), cumulative(observed)
+    n = counts[hi] - counts[lo]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = np.where(n > 0, (sums[hi] - sums[lo]) / n, np.nan)
+        sum_sq_dev = np.where(n > 0, np.maximum(squares[hi] - squares[lo] - n * mean ** 2, 0.0), 0.0)
+    return n, mean, sum_sq_dev
+
+
+KERNEL_NAMES = ('garch_variance', 'ewma_variance', 'rolling_std', 'central_moments', 'window_moments')
+LOOP_KERNELS = {name: globals()[f'_loop_{name}'] for name in KERNEL_NAMES}
+KERNELS = {'numpy': {name: globals()[f'_numpy_{name}'] for name in KERNEL_NAMES}}
+if numba is not None:
+    KERNELS['numba'] = {name: numba.njit(cache=True)(kernel) for name, kernel in LOOP_KERNELS.items()}
+
+_backend = None
+
+
+def set_backend(name=None):
+    """
+    Select the kernel backend: 'numba', 'numpy', or None for the default
+
+    The default is STATIFY_KERNELS if set, otherwise Numba when installed.
+    """
+    global _backend
+    name = name or os.environ.get('STATIFY_KERNELS') or ('numba' if 'numba' in KERNELS else 'numpy')
+    if name not in KERNELS:
+        raise ValueError(f"Kernel backend '{name}' is not available (have: {', '.join(KERNELS)})")
+    _backend = name
+    return name
+
+
+def get_backend():
+    return _backend
+
+
+def _kernel(name):
+    return KERNELS[_backend][name]
+
+
+def garch_variance(eps, omega, alpha, beta, sigma2_0):
+    """
+    GARCH(1,1) conditional variance: sigma2[t] = omega + alpha * eps[t-1]**2 + beta * sigma2[t-1]
+    """
+    return _kernel('garch_variance')(np.ascontiguousarray(eps, dtype=float), float(omega), float(alpha),
+                                     float(beta), float(sigma2_0))
+
+
+def ewma_variance(squared, ewma_lambda=0.94):
+    """
+    RiskMetrics EWMA recursion over squared returns, seeded with the first value
+    """
+    return _kernel('ewma_variance')(np.ascontiguousarray(squared, dtype=float), float(ewma_lambda))
+
+
+def rolling_std(x, window=30):
+    """
+    Rolling sample standard deviation (ddof=1), as pandas rolling(window).std()
+
+    A window containing NaN gives NaN, like the pandas default min_periods=window.
+    """
+    return _kernel('rolling_std')(np.ascontiguousarray(x, dtype=float), int(window))
+
+
+def central_moments(x):
+    """
+    (n, mean, m2, m3, m4, min, max) of the non-NaN values, with m_k the central moment sums
+    """
+    n, mean, m2, m3, m4, low, high = _kernel('central_moments')(np.ascontiguousarray(x, dtype=float))
+    return int(n), float(mean), float(m2), float(m3), float(m4), float(low), float(high)
+
+
+def window_moments(x, lo, hi):
+    """
+    Count, mean and sum of squared deviations of the non-NaN x[lo:hi] for many windows
+
+    lo and hi are arrays of bounds of any (matching) shape; results have that
+    shape, with mean NaN for windows without observations.
+    """
+    x = np.ascontiguousarray(x, dtype=float)
+    lo, hi = np.broadcast_arrays(np.asarray(lo, dtype=np.int64), np.asarray(hi, dtype=np.int64))
+    shape = lo.shape
+    lo = np.clip(lo.ravel(), 0, len(x))
+    hi = np.maximum(np.clip(hi.ravel(), 0, len(x)), lo)
+    n, mean, sum_sq_dev = _kernel('window_moments')(x, lo, hi)
+    return n.reshape(shape), mean.reshape(shape), sum_sq_dev.reshape(shape)
+
+
+set_backend()
+
+
+def _flatten(result):
+    parts = result if isinstance(result, tuple) else (result,)
+    return np.concatenate([np.ravel(np.asarray(part, dtype=float)) for part in parts])
+
+
+def compare_backends(reference, candidate, seed=0, rtol=1e-9, atol=1e-12):
+    """
+    Run every kernel on the same random inputs with two kernel dicts; return the max abs difference per kernel
+
+    Raises AssertionError naming the first kernel whose outputs disagree.
+    """
+    rng = np.random.default_rng(seed)
+    x = rng.standard_t(4, 2_000) * 0.03
+    gappy = x.copy()
+    gappy[rng.choice(len(x), 50, replace=False)] = np.nan
+    lo = rng.integers(0, len(x), 500)
+    hi = lo + rng.integers(0, 40, 500)
+
+    cases = {
+        'garch_variance': (x, 2e-5, 0.08, 0.9, x.var()),
+        'ewma_variance': (x ** 2, 0.94),
+        'rolling_std': (gappy, 30),
+        'central_moments': (gappy,),
+        'window_moments': (gappy, np.minimum(lo, len(x)), np.minimum(hi, len(x)))
+    }
+    differences = {}
+    for name, args in cases.items():
+        expected, actual = _flatten(reference[name](*args)), _flatten(candidate[name](*args))
+        if not np.allclose(expected, actual, rtol=rtol, atol=atol, equal_nan=True):
+            raise AssertionError(f"Kernel '{name}' differs between backends")
+        finite = np.isfinite(expected)
+        differences[name] = float(np.max(np.abs(expected[finite] - actual[finite]), initial=0.0))
+    return differences
+
+
+if __name__ == "__main__":
+    import time
+
+    print(f"Kernel backends available: {', '.join(KERNELS)} (active: {get_backend()})")
+    reference = KERNELS.get('numba', LOOP_KERNELS)
+    print("Max abs difference, numpy vs loop kernels:", compare_backends(reference, KERNELS['numpy']))
+
+    returns = np.random.default_rng(1).standard_normal(5_000_000) * 0.02
+    for backend in KERNELS:
+        set_backend(backend)
+        rolling_std(returns[:100], 30)
+        start = time.time()
+        rolling_std(returns, 30)
+        ewma_variance(returns ** 2)
+        garch_variance(returns, 2e-5, 0.08, 0.9, returns.var())
+        print(f"{backend}: rolling std, EWMA and GARCH over {len(returns):,} returns in {time.time() - start:.2f}s")
+    set_backend()
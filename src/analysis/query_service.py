@@ -0,0 +1,385 @@
+# File: src/analysis/query_service.py
+
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from data_collection.bitcoin_prices import load_bitcoin_data
+from data_collection.market_events import create_events_database
+from analysis.descriptive_stats import calculate_descriptive_stats
+from analysis.distribution_analysis import fit_alternative_distributions
+from analysis.event_tensor import asset_features
+from analysis.hypothesis_tests import event_impact_analysis
+from analysis.results_store import data_fingerprint
+
+ESTIMATORS = ('close', 'ewma', 'parkinson', 'garman_klass')
+
+
+def to_json(value):
+    """
+    Convert analysis results (NumPy scalars/arrays, pandas objects, NaN) to JSON-ready values
+    """
+    if isinstance(value, dict):
+        return {str(key): to_json(item) for key, item in value.items()}
+    if isinstance(value, pd.DataFrame):
+        return to_json(value.reset_index().to_dict('records'))
+    if isinstance(value, pd.Series):
+        return to_json(value.to_dict())
+    if isinstance(value, (list, tuple, np.ndarray, pd.Index)):
+        return [to_json(item) for item in value]
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return pd.Timestamp(value).isoformat()
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        return float(value) if np.isfinite(value) else None
+    return value
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache of encoded responses, bounded by their total size in bytes
+
+    Keys include the data version, so entries computed on old data are never
+    served after a reload; they simply age out (or are dropped by clear()).
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            body = self.entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key, body):
+        if len(body) > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self.size -= len(self.entries.pop(key))
+            self.entries[key] = body
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def stats(self):
+        with self.lock:
+            return {'entries': len(self.entries), 'bytes': self.size, 'max_bytes': self.max_bytes,
+                    'hits': self.hits, 'misses': self.misses}
+
+
+class AnalysisData:
+    """
+    Price and event data held in memory, reloaded when the price file changes
+
+    snapshot() stats the price CSV and reloads it if its modification time
+    moved (e.g. after main.py --append); readers always get a consistent
+    (btc_data, events_data, version) tuple, with version the data fingerprint.
+    """
+
+    def __init__(self, filename='bitcoin_prices.csv'):
+        self.filename = filename
+        self.path = Path(__file__).resolve().parents[2] / 'data' / 'raw' / filename
+        self.lock = threading.Lock()
+        self.mtime = None
+        self.current = None
+        self.snapshot()
+
+    def _mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def snapshot(self):
+        mtime = self._mtime()
+        if mtime != self.mtime or self.current is None:
+            with self.lock:
+                if mtime != self.mtime or self.current is None:
+                    btc_data = load_bitcoin_data(self.filename)
+                    if btc_data is None:
+                        raise FileNotFoundError(f"Price data not found at {self.path}")
+                    events_data = self.current[1] if self.current else create_events_database()
+                    self.current = (btc_data, events_data, data_fingerprint(btc_data, events_data))
+                    self.mtime = mtime
+                    print(f"Loaded {len(btc_data)} records (data version {self.current[2]})")
+        return self.current
+
+
+def _date_range(btc_data, params):
+    start = pd.Timestamp(params['start']) if 'start' in params else btc_data.index.min()
+    end = pd.Timestamp(params['end']) if 'end' in params else btc_data.index.max()
+    if start > end:
+        raise ValueError("start must not be after end")
+    return start, end
+
+
+def query_health(btc_data, events_data, params):
+    """Data range and size"""
+    return {
+        'records': len(btc_data),
+        'first_date': btc_data.index.min(),
+        'last_date': btc_data.index.max(),
+        'events': len(events_data)
+    }
+
+
+def query_stats(btc_data, events_data, params):
+    """Descriptive statistics over [start, end]"""
+    start, end = _date_range(btc_data, params)
+    window = btc_data.loc[start:end].copy()
+    if len(window) == 0:
+        raise ValueError("No data in the requested range")
+    return {'start': start, 'end': end, 'stats': calculate_descriptive_stats(window)}
+
+
+def query_event(btc_data, events_data, params):
+    """Impact t-test for a catalogued event (event_id) or any date"""
+    window_days = int(params.get('window_days', 10))
+    if 'event_id' in params:
+        event = events_data[events_data['event_id'] == int(params['event_id'])]
+        if len(event) == 0:
+            raise KeyError(f"Unknown event_id {params['event_id']}")
+    elif 'date' in params:
+        event = pd.DataFrame({'event_id': [0], 'event': ['custom date'], 'date': [pd.Timestamp(params['date'])],
+                              'severity': [np.nan]})
+    else:
+        raise ValueError("event needs event_id or date")
+
+    impact = event_impact_analysis(btc_data, event, window_days=window_days, plot=False)
+    if len(impact) == 0:
+        raise KeyError("No data around the requested event")
+    return {'window_days': window_days, 'date': event['date'].iloc[0], **impact.iloc[0].to_dict()}
+
+
+def query_volatility(btc_data, events_data, params):
+    """Volatility series for one estimator and window, over [start, end]"""
+    estimator = params.get('estimator', 'close')
+    if estimator not in ESTIMATORS:
+        raise ValueError(f"estimator must be one of {', '.join(ESTIMATORS)}")
+    window = int(params.get('window', 30))
+    if window < 2:
+        raise ValueError("window must be at least 2")
+    ewma_lambda = float(params.get('ewma_lambda', 0.94))
+
+    start, end = _date_range(btc_data, params)
+    # Computed on the full history so the window is warm at start
+    series = asset_features(btc_data, window, ewma_lambda)[f'volatility_{estimator}'].loc[start:end]
+    return {'estimator': estimator, 'window': window, 'dates': series.index.strftime('%Y-%m-%d'),
+            'values': series.to_numpy()}
+
+
+def query_distribution(btc_data, events_data, params):
+    """Alternative distribution fits of daily returns over [start, end]"""
+    start, end = _date_range(btc_data, params)
+    returns = btc_data.loc[start:end, 'Daily_Return'].dropna()
+    if len(returns) < 30:
+        raise ValueError("At least 30 returns are needed for distribution fits")
+    fits = fit_alternative_distributions(returns)
+    return {'start': start, 'end': end, 'n': len(returns), 'best_aic': min(fits, key=lambda d: fits[d]['aic']),
+            'fits': fits}
+
+
+ENDPOINTS = {
+    '/health': query_health,
+    '/stats': query_stats,
+    '/event': query_event,
+    '/volatility': query_volatility,
+    '/distribution': query_distribution
+}
+
+
+class QueryService:
+    """
+    Dispatches queries to the endpoint functions through the result cache
+
+    Identical queries arriving while one is being computed wait for it and
+    are then served from the cache instead of computing the same result again.
+    """
+
+    def __init__(self, data=None, cache=None):
+        self.data = data or AnalysisData()
+        self.cache = cache or ResultCache()
+        self.version = self.data.snapshot()[2]
+        self.version_lock = threading.Lock()
+        self.in_flight = {}
+        self.in_flight_lock = threading.Lock()
+
+    def _compute(self, path, params, btc_data, events_data, version):
+        try:
+            result = ENDPOINTS[path](btc_data, events_data, params)
+        except KeyError as e:
+            return 404, json.dumps({'error': str(e.args[0] if e.args else e)}).encode()
+        except ValueError as e:
+            return 400, json.dumps({'error': str(e)}).encode()
+
+        if path == '/health':
+            result['cache'] = self.cache.stats()
+        return 200, json.dumps({'data_version': version, **to_json(result)}).encode()
+
+    def handle(self, path, params):
+        """Return (status, JSON body bytes, cache status) for one request"""
+        if path not in ENDPOINTS:
+            return 404, json.dumps({'error': f"Unknown endpoint {path}",
+                                    'endpoints': sorted(ENDPOINTS)}).encode(), 'none'
+
+        btc_data, events_data, version = self.data.snapshot()
+        if version != self.version:
+            with self.version_lock:
+                # A request still holding an older snapshot must not roll the version back
+                if version != self.version and version == self.data.current[2]:
+                    # Entries keyed on the old version can never be hit again
+                    self.cache.clear()
+                    self.version = version
+        if path == '/health':
+            return (*self._compute(path, params, btc_data, events_data, version), 'none')
+
+        key = (path, tuple(sorted(params.items())), version)
+        body = self.cache.get(key)
+        if body is not None:
+            return 200, body, 'hit'
+
+        with self.in_flight_lock:
+            done = self.in_flight.get(key)
+            leader = done is None
+            if leader:
+                done = self.in_flight[key] = threading.Event()
+        if not leader:
+            done.wait()
+            body = self.cache.get(key)
+            if body is not None:
+                return 200, body, 'hit'
+
+        try:
+            status, body = self._compute(path, params, btc_data, events_data, version)
+            if status == 200:
+                self.cache.put(key, body)
+            return status, body, 'miss'
+        finally:
+            if leader:
+                with self.in_flight_lock:
+                    del self.in_flight[key]
+                done.set()
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """GET /<endpoint>?param=value..., answered with JSON"""
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        path = url.path.rstrip('/') or '/health'
+        try:
+            status, body, cache_status = self.server.service.handle(path, dict(parse_qsl(url.query)))
+        except Exception as e:
+            status, body, cache_status = 500, json.dumps({'error': str(e)}).encode(), 'none'
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('X-Cache', cache_status)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class PooledHTTPServer(HTTPServer):
+    """
+    HTTPServer that handles each connection on a fixed-size thread pool
+
+    Unlike ThreadingHTTPServer the number of concurrent handlers is bounded;
+    further connections wait in the pool's queue.
+    """
+
+    def __init__(self, address, service, workers=8, verbose=False):
+        super().__init__(address, QueryHandler)
+        self.service = service
+        self.verbose = verbose
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='query')
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._process, request, client_address)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=True)
+
+
+def serve(host='127.0.0.1', port=8050, workers=8, cache_bytes=64 * 1024 * 1024, verbose=False):
+    """
+    Run the query service until interrupted
+    """
+    service = QueryService(cache=ResultCache(cache_bytes))
+    server = PooledHTTPServer((host, port), service, workers, verbose)
+    print(f"Query service on http://{host}:{server.server_port} ({workers} workers, "
+          f"endpoints: {', '.join(sorted(ENDPOINTS))})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nQuery service stopped.")
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    import time
+    from urllib.request import urlopen
+
+    server = PooledHTTPServer(('127.0.0.1', 0), QueryService(), workers=4)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    for query in ['/stats?start=2021-01-01&end=2021-12-31', '/event?event_id=5',
+                  '/volatility?estimator=parkinson&window=14&start=2024-01-01',
+                  '/distribution?start=2022-01-01', '/stats?start=2021-01-01&end=2021-12-31']:
+        start = time.time()
+        with urlopen(base + query) as response:
+            payload = json.loads(response.read())
+            print(f"{query}: {response.headers['X-Cache']} in {(time.time() - start) * 1000:.1f}ms, "
+                  f"keys: {', '.join(list(payload)[:5])}")
+
+    with urlopen(base + '/health') as response:
+        print(json.loads(response.read())['cache'])
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,393 @@
+# File: src/analysis/results_store.py
+
+import hashlib
+import json
+import sqlite3
+import uuid
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+EVENT_COLUMNS = ['event_id', 'event', 'event_type', 'price_impact', 'severity', 'before_volatility_mean',
+                 'after_volatility_mean', 'volatility_change', 't_statistic', 'p_value', 'significant']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    parameters TEXT NOT NULL,
+    data_fingerprint TEXT NOT NULL,
+    first_date TEXT,
+    last_date TEXT,
+    n_records INTEGER,
+    n_events INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_runs_created ON runs (created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_fingerprint ON runs (data_fingerprint);
+
+CREATE TABLE IF NOT EXISTS scalar_results (
+    run_id TEXT NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+    section TEXT NOT NULL,
+    name TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    value
+);
+CREATE INDEX IF NOT EXISTS idx_scalar_run_section ON scalar_results (run_id, section);
+CREATE INDEX IF NOT EXISTS idx_scalar_lookup ON scalar_results (section, name, metric);
+
+CREATE TABLE IF NOT EXISTS event_impacts (
+    run_id TEXT NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+    event_id INTEGER NOT NULL,
+    event TEXT,
+    event_type TEXT,
+    price_impact TEXT,
+    severity REAL,
+    before_volatility_mean REAL,
+    after_volatility_mean REAL,
+    volatility_change REAL,
+    t_statistic REAL,
+    p_value REAL,
+    significant INTEGER,
+    PRIMARY KEY (run_id, event_id)
+);
+CREATE INDEX IF NOT EXISTS idx_events_significant ON event_impacts (significant, run_id);
+CREATE INDEX IF NOT EXISTS idx_events_event ON event_impacts (event_id);
+"""
+
+
+def data_fingerprint(*frames):
+    """
+    Content hash of the input DataFrames (index and values)
+    """
+    digest = hashlib.sha256()
+    for frame in frames:
+        digest.update(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes())
+        digest.update(','.join(map(str, frame.columns)).encode())
+    return digest.hexdigest()[:16]
+
+
+def _to_sql_value(value):
+    if isinstance(value, (bool, np.bool_)):
+        return int(value)
+    if isinstance(value, (np.integer,)):
+        return int(value)
+    if isinstance(value, (np.floating, float)):
+        return None if np.isnan(value) else float(value)
+    return value
+
+
+def _flatten(results, path=()):
+    """
+    Yield (path, value) pairs for a nested results dict; arrays expand to path_i
+    """
+    for key, value in results.items():
+        if isinstance(value, dict):
+            yield from _flatten(value, path + (str(key),))
+        elif isinstance(value, (list, tuple, np.ndarray)):
+            for i, item in enumerate(np.ravel(value)):
+                yield path + (f'{key}_{i}',), item
+        else:
+            yield path + (str(key),), value
+
+
+class ResultsStore:
+    """
+    SQLite store of analysis results keyed by run id
+
+    Each run records its parameters and a fingerprint of the input data.
+    Stats dicts go to scalar_results as (section, name, metric, value) rows
+    and per-event impacts to their own indexed table, so results can be
+    queried and compared across runs and text reports rebuilt from the store.
+    """
+
+    def __init__(self, path=None):
+        if path is None:
+            path = Path(__file__).resolve().parents[2] / 'results' / 'results.db'
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = str(path)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA foreign_keys=ON')
+        self.conn.executescript(SCHEMA)
+
+        # Stores created before events carried a price direction
+        columns = [row[1] for row in self.conn.execute('PRAGMA table_info(event_impacts)')]
+        if 'price_impact' not in columns:
+            self.conn.execute('ALTER TABLE event_impacts ADD COLUMN price_impact TEXT')
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Writing
+
+    def start_run(self, btc_data, events_data, parameters=None, mode='full'):
+        """Register a new run and return its id"""
+        run_id = pd.Timestamp.now().strftime('%Y%m%d%H%M%S') + '-' + uuid.uuid4().hex[:8]
+        with self.conn:
+            self.conn.execute(
+                'INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (run_id, pd.Timestamp.now().isoformat(), mode,
+                 json.dumps(parameters or {}, sort_keys=True, default=str),
+                 data_fingerprint(btc_data, events_data),
+                 btc_data.index.min().strftime('%Y-%m-%d'), btc_data.index.max().strftime('%Y-%m-%d'),
+                 len(btc_data), len(events_data)))
+        return run_id
+
+    def save_results(self, run_id, section, results):
+        """Bulk insert a (nested) results dict, e.g. descriptive stats or normality tests"""
+        rows = []
+        for path, value in _flatten(results):
+            name = '/'.join(path[:-1]) if len(path) > 1 else ''
+            rows.append((run_id, section, name, path[-1], _to_sql_value(value)))
+        with self.conn:
+            self.conn.executemany('INSERT INTO scalar_results VALUES (?, ?, ?, ?, ?)', rows)
+
+    def save_table(self, run_id, section, table):
+        """Store a DataFrame (e.g. VaR/ES) as scalar results, one name per row"""
+        results = {}
+        for index, row in table.iterrows():
+            name = '|'.join(map(str, index)) if isinstance(index, tuple) else str(index)
+            results[name] = row.to_dict()
+        for key, value in table.attrs.items():
+            results.setdefault('attrs', {})[key] = value
+        self.save_results(run_id, section, results)
+
+    def save_event_impacts(self, run_id, impact_results):
+        """Bulk insert the per-event output of event_impact_analysis"""
+        frame = impact_results.reindex(columns=EVENT_COLUMNS)
+        rows = [(run_id,) + tuple(_to_sql_value(v) for v in record)
+                for record in frame.itertuples(index=False, name=None)]
+        with self.conn:
+            self.conn.executemany(f'INSERT INTO event_impacts (run_id, {", ".join(EVENT_COLUMNS)}) '
+                                  f'VALUES ({", ".join("?" * (len(EVENT_COLUMNS) + 1))})', rows)
+
+    def carry_over(self, run_id, source_run_id, sections):
+        """
+        Copy sections saved by an earlier run into this one, recording the run each came from
+
+        sections is a list of section names, or a dict mapping source sections to
+        their names in this run; the origins are saved in the 'sources' section.
+        """
+        if not isinstance(sections, dict):
+            sections = {section: section for section in sections}
+        with self.conn:
+            for source, target in sections.items():
+                self.conn.execute('INSERT INTO scalar_results SELECT ?, ?, name, metric, value FROM scalar_results '
+                                  'WHERE run_id = ? AND section = ?', (run_id, target, source_run_id, source))
+        self.save_results(run_id, 'sources', {target: source_run_id for target in sections.values()})
+
+    # Reading
+
+    def runs(self, limit=None):
+        query = 'SELECT * FROM runs ORDER BY created_at DESC'
+        if limit is not None:
+            query += f' LIMIT {int(limit)}'
+        return pd.read_sql_query(query, self.conn)
+
+    def latest_run(self, mode=None):
+        query = 'SELECT run_id FROM runs'
+        params = ()
+        if mode is not None:
+            query += ' WHERE mode = ?'
+            params = (mode,)
+        row = self.conn.execute(query + ' ORDER BY created_at DESC LIMIT 1', params).fetchone()
+        return row[0] if row else None
+
+    def load_results(self, run_id, section):
+        """Rebuild the nested {name: {metric: value}} dict saved for a section"""
+        results = {}
+        for name, metric, value in self.conn.execute(
+                'SELECT name, metric, value FROM scalar_results WHERE run_id = ? AND section = ?',
+                (run_id, section)):
+            target = results
+            for part in name.split('/') if name else []:
+                target = target.setdefault(part, {})
+            target[metric] = np.nan if value is None else value
+        return results
+
+    def load_event_impacts(self, run_id):
+        return pd.read_sql_query('SELECT * FROM event_impacts WHERE run_id = ? ORDER BY event_id',
+                                 self.conn, params=(run_id,))
+
+    def significant_events(self, last_n_runs=100):
+        """Events with a significant impact in any of the last N runs, with counts"""
+        return pd.read_sql_query("""
+            SELECT e.event_id, e.event,
+                   COUNT(*) AS runs_significant,
+                   AVG(e.volatility_change) AS mean_volatility_change,
+                   MIN(e.p_value) AS min_p_value
+            FROM event_impacts e
+            JOIN (SELECT run_id FROM runs ORDER BY created_at DESC LIMIT ?) r ON r.run_id = e.run_id
+            WHERE e.significant = 1
+            GROUP BY e.event_id, e.event
+            ORDER BY runs_significant DESC, e.event_id
+        """, self.conn, params=(int(last_n_runs),))
+
+    def metric_history(self, section, name, metric, last_n_runs=100):
+        """One metric across the last N runs, e.g. ('descriptive', 'returns', 'std')"""
+        return pd.read_sql_query("""
+            SELECT r.run_id, r.created_at, r.data_fingerprint, s.value
+            FROM scalar_results s JOIN runs r ON r.run_id = s.run_id
+            WHERE s.section = ? AND s.name = ? AND s.metric = ?
+            ORDER BY r.created_at DESC LIMIT ?
+        """, self.conn, params=(section, name, metric, int(last_n_runs)))
+
+    def export_parquet(self, directory):
+        """Dump every table to Parquet (requires pyarrow or fastparquet)"""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for table in ['runs', 'scalar_results', 'event_impacts']:
+            frame = pd.read_sql_query(f'SELECT * FROM {table}', self.conn)
+            if table == 'scalar_results':
+                # Mixed numeric/text column, kept as text in Parquet
+                frame['value'] = frame['value'].astype(str)
+            frame.to_parquet(directory / f'{table}.parquet', index=False)
+
+    # Reports
+
+    def _normality_tests(self, run_id, sources):
+        """(name, result, origin) for the run's normality tests, then those carried over from a full run"""
+        tests = self.load_results(run_id, 'normality')
+        rows = [(name, result, '') for name, result in tests.items()]
+        for name, result in self.load_results(run_id, 'normality_full').items():
+            if name not in tests:
+                rows.append((name, result, f" [run {sources['normality_full']}]"))
+        return rows
+
+    def render_descriptive_stats(self, run_id):
+        desc_stats = self.load_results(run_id, 'descriptive')
+        normality_results = self._normality_tests(run_id, self.load_results(run_id, 'sources'))
+
+        lines = ["BITCOIN VOLATILITY ANALYSIS - DESCRIPTIVE STATISTICS", "=" * 50, ""]
+        lines.append("DESCRIPTIVE STATISTICS:")
+        for name, values in desc_stats.items():
+            lines.append(f"{name}:")
+            lines.extend(f"  {metric}: {value:.6g}" for metric, value in values.items())
+        lines.append("")
+        lines.append("NORMALITY TEST RESULTS:")
+        for name, values, origin in normality_results:
+            lines.append(f"{name}: statistic={values['statistic']:.4f} p_value={values['p_value']:.4g} "
+                         f"({'Normal' if values['is_normal'] else 'Not Normal'}){origin}")
+        return '\n'.join(lines) + '\n'
+
+    def render_summary_report(self, run_id):
+        run = pd.read_sql_query('SELECT * FROM runs WHERE run_id = ?', self.conn, params=(run_id,)).iloc[0]
+        desc_stats = self.load_results(run_id, 'descriptive')
+        sources = self.load_results(run_id, 'sources')
+        normality_results = self._normality_tests(run_id, sources)
+        risk = self.load_results(run_id, 'risk_mc')
+        historical_risk = self.load_results(run_id, 'risk_historical')
+        vol_forecast = self.load_results(run_id, 'vol_forecast')
+        seasonality = self.load_results(run_id, 'seasonality')
+        correlation_results = self.load_results(run_id, 'correlation')
+        surface = self.load_results(run_id, 'severity_surface')
+        stratified = self.load_results(run_id, 'event_groups')
+        impact_results = self.load_event_impacts(run_id)
+
+        def origin(section):
+            # Sections carried over from an earlier run name the run they came from
+            return f" [run {sources[section]}]" if section in sources else ""
+
+        lines = ["BITCOIN VOLATILITY ANALYSIS - SUMMARY REPORT", "=" * 50, ""]
+        lines.append(f"Analysis Date: {pd.Timestamp(run['created_at']).strftime('%Y-%m-%d %H:%M:%S')}")
+        lines.append(f"Run: {run_id} ({run['mode']}, data {run['data_fingerprint']})")
+        lines.append(f"Data Period: {run['first_date']} to {run['last_date']}")
+        lines.append(f"Total Records: {run['n_records']}")
+        lines.append(f"Total Events: {run['n_events']}")
+        lines.append("")
+
+        lines.append("KEY FINDINGS:")
+        lines.append("-" * 15)
+        lines.append(f"Mean Daily Return: {desc_stats['returns']['mean']:.4f}")
+        lines.append(f"Daily Return Std Dev: {desc_stats['returns']['std']:.4f}")
+        lines.append(f"Mean Volatility (30d): {desc_stats['volatility']['mean']:.4f}")
+        lines.append(f"Returns Skewness: {desc_stats['returns']['skewness']:.4f}")
+        lines.append(f"Returns Kurtosis: {desc_stats['returns']['kurtosis']:.4f}")
+        lines.append("")
+
+        if seasonality:
+            lines.append(f"SEASONALITY (mean absolute return relative to overall):{origin('seasonality')}")
+            lines.append("-" * 20)
+            for key, profile in seasonality.items():
+                bins = {label: row for label, row in profile.items() if label != 'attrs'}
+                high = max(bins, key=lambda label: bins[label]['relative_to_overall'])
+                low = min(bins, key=lambda label: bins[label]['relative_to_overall'])
+                lines.append(f"{key}: highest {high} ({bins[high]['relative_to_overall']:.2f}x), "
+                             f"lowest {low} ({bins[low]['relative_to_overall']:.2f}x), "
+                             f"ANOVA p={profile.get('attrs', {}).get('anova_p_value', np.nan):.4f}")
+            lines.append("")
+
+        if vol_forecast:
+            lines.append(f"VOLATILITY FORECASTS (walk-forward, 1 day ahead):{origin('vol_forecast')}")
+            lines.append("-" * 20)
+            for model, row in sorted(vol_forecast.items(), key=lambda item: item[1]['qlike']):
+                lines.append(f"{model.upper()}: QLIKE={row['qlike']:.4f} MSE={row['mse']:.3e} "
+                             f"next-day vol={row['next_day_volatility']:.4f} ({int(row['n_forecasts'])} forecasts)")
+            lines.append("")
+
+        lines.append("NORMALITY TESTS:")
+        lines.append("-" * 15)
+        for test_name, test_result, test_origin in normality_results:
+            lines.append(f"{test_name}: {'Normal' if test_result['is_normal'] else 'Not Normal'} "
+                         f"(p={test_result['p_value']:.4f}){test_origin}")
+
+        if risk:
+            lines.append("")
+            lines.append(f"RISK MEASURES (VaR / ES, losses positive):{origin('risk_mc')}")
+            lines.append("-" * 20)
+            lines.append(f"Monte Carlo model: {risk.get('attrs', {}).get('distribution')} (best AIC fit)")
+            for key, row in risk.items():
+                if key == 'attrs':
+                    continue
+                horizon, confidence = key.split('|')
+                hist = historical_risk[key]
+                lines.append(f"{horizon}d {float(confidence):.0%}: MC VaR={row['var']:.4f} ES={row['es']:.4f} | "
+                             f"Historical VaR={hist['var']:.4f} ES={hist['es']:.4f}")
+
+        lines.append("")
+        lines.append("EVENT IMPACT ANALYSIS:")
+        lines.append("-" * 20)
+        lines.append(f"Events with significant impact: {int(impact_results['significant'].sum())}")
+        lines.append(f"Correlation between severity and volatility change: {correlation_results['correlation_coefficient']:.4f}")
+        lines.append(f"Correlation significant: {bool(correlation_results['significant'])}")
+        if 'spearman_coefficient' in correlation_results:
+            lines.append(f"Spearman / Kendall: {correlation_results['spearman_coefficient']:.4f} "
+                         f"(p={correlation_results['spearman_p_value']:.4f}) / "
+                         f"{correlation_results['kendall_tau']:.4f} (p={correlation_results['kendall_p_value']:.4f})")
+        if surface:
+            significant = [int(w) for w, row in surface.items() if row['spearman_p_value'] < 0.05]
+            lines.append(f"Windows (1-{len(surface)}d) with significant Spearman correlation: {len(significant)}"
+                         + (f" ({min(significant)}-{max(significant)}d)" if significant else "")
+                         + origin('severity_surface'))
+
+        if stratified:
+            lines.append("")
+            lines.append(f"IMPACT BY EVENT TYPE AND DIRECTION (BH-FDR corrected):{origin('event_groups')}")
+            lines.append("-" * 20)
+            for key, row in stratified.items():
+                if key == 'attrs' or '*' in key:
+                    continue
+                group = key.split('|', 1)[1]
+                flag = ' *' if row['significant'] else ''
+                lines.append(f"{group}: n={int(row['n_events'])} mean change={row['mean_volatility_change']:.4f} "
+                             f"q={row['q_value']:.4f}{flag}")
+            for grouping, test in stratified.get('attrs', {}).get('anova', {}).items():
+                if '*' not in grouping:
+                    lines.append(f"ANOVA across {grouping}: F={test['anova_f_statistic']:.4f} (p={test['anova_p_value']:.4f})")
+        return '\n'.join(lines) + '\n'
+
+
+if __name__ == "__main__":
+    with ResultsStore() as store:
+        print("Recent runs:")
+        print(store.runs(limit=10))
+        print("\nEvents with significant impact across the last 100 runs:")
+        print(store.significant_events(last_n_runs=100))
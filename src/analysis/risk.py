@@ -0,0 +1,330 @@
+# File: src/analysis/risk.py
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy import optimize, stats
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from analysis.distribution_analysis import fit_alternative_distributions
+from analysis.kernels import garch_variance
+from analysis.shared_data import parallel_map
+
+
+def select_best_distribution(fit_results, criterion='aic'):
+    """
+    Pick the best fitted distribution from fit_alternative_distributions output
+    """
+    best_name = min(fit_results, key=lambda name: fit_results[name][criterion])
+    return best_name, tuple(fit_results[best_name]['parameters'])
+
+
+def fit_garch(returns, start=None):
+    """
+    Fit a GARCH(1,1) model to daily returns by Gaussian quasi-maximum likelihood
+
+    start may be a previous fit_garch result to warm-start the optimiser.
+    """
+    r = np.asarray(pd.Series(returns).dropna(), dtype=float)
+
+    # Work in percent to keep the optimiser well scaled
+    scale = 100.0
+    y = r * scale
+    sigma2_0 = y.var()
+
+    def neg_log_likelihood(theta):
+        mu, omega, alpha, beta = theta
+        eps = y - mu
+        sigma2 = garch_variance(eps, omega, alpha, beta, sigma2_0)
+        return 0.5 * np.sum(np.log(2 * np.pi * sigma2) + eps ** 2 / sigma2)
+
+    if start is None:
+        start = [y.mean(), 0.1 * sigma2_0, 0.1, 0.8]
+    else:
+        start = [start['mu'] * scale, start['omega'] * scale ** 2, start['alpha'], start['beta']]
+    bounds = [(None, None), (1e-8, None), (0.0, 1.0), (0.0, 1.0)]
+    constraints = [{'type': 'ineq', 'fun': lambda theta: 0.9999 - theta[2] - theta[3]}]
+    fit = optimize.minimize(neg_log_likelihood, start, method='SLSQP',
+                            bounds=bounds, constraints=constraints)
+
+    mu, omega, alpha, beta = fit.x
+    eps = y - mu
+    sigma2 = garch_variance(eps, omega, alpha, beta, sigma2_0)
+
+    return {
+        'mu': mu / scale,
+        'omega': omega / scale ** 2,
+        'alpha': alpha,
+        'beta': beta,
+        'log_likelihood': -fit.fun,
+        'converged': bool(fit.success),
+        'conditional_volatility': np.sqrt(sigma2) / scale,
+        'standardized_residuals': eps / np.sqrt(sigma2),
+        'last_residual': eps[-1] / scale,
+        'last_variance': sigma2[-1] / scale ** 2
+    }
+
+
+def _horizon_returns(daily_returns, horizons):
+    """
+    Compound simulated daily returns (paths x days) into horizon returns
+    """
+    log_growth = np.cumsum(np.log1p(np.maximum(daily_returns, -0.999999)), axis=1)
+    return np.expm1(log_growth[:, np.asarray(horizons) - 1])
+
+
+def _simulate_chunk(model, n_paths, horizons, seed):
+    """
+    Simulate one chunk of return paths and return their horizon returns
+    """
+    rng = np.random.default_rng(seed)
+    max_h = max(horizons)
+
+    if model['kind'] == 'distribution':
+        dist = getattr(stats, model['distribution'])
+        daily = dist.rvs(*model['parameters'], size=(n_paths, max_h), random_state=rng)
+        return _horizon_returns(daily, horizons)
+
+    # GARCH-driven paths, innovations either parametric or bootstrapped
+    if model['kind'] == 'garch':
+        dist = getattr(stats, model['distribution'])
+        z = dist.rvs(*model['parameters'], size=(n_paths, max_h), random_state=rng)
+    else:
+        residuals = model['standardized_residuals']
+        z = residuals[rng.integers(0, len(residuals), size=(n_paths, max_h))]
+
+    omega, alpha, beta = model['omega'], model['alpha'], model['beta']
+    sigma2 = np.full(n_paths, omega + alpha * model['last_residual'] ** 2 + beta * model['last_variance'])
+    daily = np.empty((n_paths, max_h))
+    for h in range(max_h):
+        eps = np.sqrt(sigma2) * z[:, h]
+        daily[:, h] = model['mu'] + eps
+        sigma2 = omega + alpha * eps ** 2 + beta * sigma2
+
+    return _horizon_returns(daily, horizons)
+
+
+def _simulate_task(arrays, task):
+    """
+    parallel_map worker: FHS residuals arrive as a shared array rather than in the spec
+    """
+    spec, n_paths, horizons, seed = task
+    if 'standardized_residuals' in arrays:
+        spec = {**spec, 'standardized_residuals': arrays['standardized_residuals']}
+    return _simulate_chunk(spec, n_paths, horizons, seed)
+
+
+def _var_es_table(horizon_returns, horizons, confidence_levels):
+    """
+    Turn simulated or historical horizon returns into a VaR/ES table (losses positive)
+    """
+    rows = []
+    for j, h in enumerate(horizons):
+        sample = horizon_returns[:, j]
+        sample = sample[~np.isnan(sample)]
+        for cl in confidence_levels:
+            q = np.quantile(sample, 1 - cl)
+            tail = sample[sample <= q]
+            rows.append({
+                'horizon': h,
+                'confidence': cl,
+                'var': -q,
+                'es': -tail.mean() if len(tail) > 0 else -q,
+                'n_obs': len(sample)
+            })
+    return pd.DataFrame(rows).set_index(['horizon', 'confidence'])
+
+
+def build_risk_model(returns, model='distribution', criterion='aic'):
+    """
+    Build the simulation model from the fitted return distributions
+
+    model='distribution' draws iid returns from the best fitted distribution,
+    model='garch' drives a GARCH(1,1) with the best distribution fitted to its
+    standardized residuals, model='fhs' bootstraps those residuals instead.
+    """
+    returns = pd.Series(returns).dropna()
+
+    if model == 'distribution':
+        name, params = select_best_distribution(fit_alternative_distributions(returns), criterion)
+        return {'kind': 'distribution', 'distribution': name, 'parameters': params}
+
+    garch = fit_garch(returns)
+    spec = {
+        'kind': model,
+        'mu': garch['mu'],
+        'omega': garch['omega'],
+        'alpha': garch['alpha'],
+        'beta': garch['beta'],
+        'last_residual': garch['last_residual'],
+        'last_variance': garch['last_variance']
+    }
+    if model == 'garch':
+        fits = fit_alternative_distributions(garch['standardized_residuals'])
+        spec['distribution'], spec['parameters'] = select_best_distribution(fits, criterion)
+    elif model == 'fhs':
+        spec['standardized_residuals'] = garch['standardized_residuals']
+    else:
+        raise ValueError(f"Unknown risk model: {model}")
+    return spec
+
+
+def monte_carlo_var_es(returns, horizons=(1, 10), confidence_levels=(0.95, 0.99),
+                       model='distribution', n_paths=100_000, chunk_size=50_000,
+                       n_workers=None, seed=None):
+    """
+    Monte Carlo VaR and Expected Shortfall at several horizons
+
+    Paths are generated in chunks of at most chunk_size rows so memory stays
+    bounded, and each chunk gets its own child seed so results are identical
+    whatever the number of workers.
+    """
+    horizons = sorted(horizons)
+    spec = model if isinstance(model, dict) else build_risk_model(returns, model)
+
+    n_chunks = -(-n_paths // chunk_size)
+    sizes = [chunk_size] * (n_chunks - 1) + [n_paths - chunk_size * (n_chunks - 1)]
+    seeds = np.random.SeedSequence(seed).spawn(n_chunks)
+
+    # Large arrays go to the workers through shared memory, the rest of the spec is pickled
+    shared = {key: spec[key] for key in ['standardized_residuals'] if key in spec}
+    task_spec = {key: value for key, value in spec.items() if key not in shared}
+    tasks = [(task_spec, size, horizons, s) for size, s in zip(sizes, seeds)]
+    chunks = parallel_map(_simulate_task, tasks, shared, n_workers)
+
+    table = _var_es_table(np.vstack(chunks), horizons, confidence_levels)
+    table.attrs['model'] = spec['kind']
+    table.attrs['distribution'] = spec.get('distribution')
+    return table
+
+
+def historical_var_es(returns, horizons=(1, 10), confidence_levels=(0.95, 0.99)):
+    """
+    Historical simulation VaR and Expected Shortfall from overlapping horizon returns
+    """
+    r = np.asarray(pd.Series(returns).dropna(), dtype=float)
+    horizons = sorted(horizons)
+    log_growth = np.concatenate([[0.0], np.cumsum(np.log1p(r))])
+
+    columns = []
+    for h in horizons:
+        overlapping = np.expm1(log_growth[h:] - log_growth[:-h])
+        padded = np.full(len(r), np.nan)
+        padded[:len(overlapping)] = overlapping
+        columns.append(padded)
+
+    return _var_es_table(np.column_stack(columns), horizons, confidence_levels)
+
+
+def filtered_historical_var_es(returns, horizons=(1, 10), confidence_levels=(0.95, 0.99),
+                               n_paths=100_000, chunk_size=50_000, n_workers=None, seed=None):
+    """
+    Filtered historical simulation: GARCH-filtered residuals bootstrapped forward
+    """
+    return monte_carlo_var_es(returns, horizons, confidence_levels, model='fhs',
+                              n_paths=n_paths, chunk_size=chunk_size,
+                              n_workers=n_workers, seed=seed)
+
+
+def kupiec_test(exceptions, confidence):
+    """
+    Kupiec proportion-of-failures test for VaR exceptions
+    """
+    exceptions = np.asarray(exceptions, dtype=bool)
+    n = len(exceptions)
+    x = int(exceptions.sum())
+    p = 1 - confidence
+
+    if x == 0:
+        lr = -2 * n * np.log(1 - p)
+    elif x == n:
+        lr = -2 * n * np.log(p)
+    else:
+        phat = x / n
+        lr = -2 * ((n - x) * np.log(1 - p) + x * np.log(p)
+                   - (n - x) * np.log(1 - phat) - x * np.log(phat))
+    p_value = stats.chi2.sf(lr, df=1)
+
+    return {
+        'observations': n,
+        'exceptions': x,
+        'expected_exceptions': n * p,
+        'lr_statistic': lr,
+        'p_value': p_value,
+        'rejected': p_value < 0.05
+    }
+
+
+def backtest_var(returns, method='historical', window=500, confidence=0.99, refit_every=22):
+    """
+    Backtest one-day VaR forecasts over a rolling estimation window
+
+    method='historical' uses the empirical quantile of the window,
+    method='fhs' rescales GARCH-filtered residuals by the next-day volatility.
+    The GARCH model is refitted on the trailing window every refit_every days
+    (warm-started from the previous fit) and filtered forward with fixed
+    parameters in between, so each forecast only uses returns before its day.
+    """
+    returns = pd.Series(returns).dropna()
+    r = returns.to_numpy(dtype=float)
+    if len(r) <= window:
+        raise ValueError(f"Need more than {window} observations, got {len(r)}")
+
+    if method == 'historical':
+        windows = np.lib.stride_tricks.sliding_window_view(r[:-1], window)
+        forecasts = -np.quantile(windows, 1 - confidence, axis=1)
+    elif method == 'fhs':
+        forecasts = np.empty(len(r) - window)
+        garch = None
+        for block_start in range(window, len(r), refit_every):
+            sample = r[block_start - window:block_start]
+            garch = fit_garch(sample, start=garch)
+
+            # Filter from the start of the estimation window through the block;
+            # sigma2[i] only depends on returns before day i
+            block_end = min(block_start + refit_every, len(r))
+            eps = r[block_start - window:block_end] - garch['mu']
+            sigma2 = garch_variance(eps, garch['omega'], garch['alpha'], garch['beta'], sample.var())
+            z = eps / np.sqrt(sigma2)
+
+            # Day i's quantile comes from the residuals of the window days before it
+            z_q = np.quantile(np.lib.stride_tricks.sliding_window_view(z[:-1], window), 1 - confidence, axis=1)
+            forecasts[block_start - window:block_end - window] = -(garch['mu'] + np.sqrt(sigma2[window:]) * z_q)
+    else:
+        raise ValueError(f"Unknown backtest method: {method}")
+
+    realized = r[window:]
+    exceptions = -realized > forecasts
+    backtest = pd.DataFrame({
+        'return': realized,
+        'var_forecast': forecasts,
+        'exception': exceptions
+    }, index=returns.index[window:])
+
+    return backtest, kupiec_test(exceptions, confidence)
+
+
+if __name__ == "__main__":
+    project_root = Path(__file__).resolve().parents[2]
+
+    btc_data = pd.read_csv(project_root / 'data' / 'raw' / 'bitcoin_prices.csv', skiprows=2, header=0)
+    column_names = ['Date', 'Price', 'Close', 'High', 'Low', 'Open', 'Volume', 'Daily_Return', 'Volatility_30d', 'Abs_Return']
+    btc_data.columns = column_names
+    btc_data['Date'] = pd.to_datetime(btc_data['Date'], errors='coerce')
+    btc_data = btc_data.set_index('Date')
+    btc_data = btc_data[btc_data.index.notna()]
+    returns = btc_data['Daily_Return'].dropna()
+
+    print("Historical simulation:")
+    print(historical_var_es(returns))
+    print("\nMonte Carlo (best-fit distribution):")
+    print(monte_carlo_var_es(returns, seed=42))
+    print("\nFiltered historical simulation:")
+    print(filtered_historical_var_es(returns, seed=42))
+
+    backtest, kupiec = backtest_var(returns, method='fhs')
+    print("\nFHS backtest (99% one-day VaR):")
+    print(kupiec)
@@ -0,0 +1,233 @@
+# File: src/analysis/seasonality.py
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+NS_PER_HOUR = 3_600_000_000_000
+HOURS_PER_DAY = 24
+
+# Calendar keys and their bin labels
+CALENDAR_KEYS = {
+    'day_of_week': ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'],
+    'month': ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'],
+    'hour': [f'{h:02d}:00' for h in range(24)],
+    'weekend': ['weekday', 'weekend']
+}
+
+# Joint cells: month x day of week x hour
+N_CELLS = 12 * 7 * 24
+_CELL = np.arange(N_CELLS)
+_CELL_KEYS = {
+    'month': _CELL // (7 * 24),
+    'day_of_week': (_CELL // 24) % 7,
+    'hour': _CELL % 24,
+    'weekend': ((_CELL // 24) % 7 >= 5).astype(np.int64)
+}
+
+
+def calendar_cells(timestamps):
+    """
+    Joint calendar cell (month * 168 + day_of_week * 24 + hour) from datetime64[ns] values
+
+    Integer arithmetic on the raw nanoseconds, months via a search over the
+    month start days in range; timestamps are taken as UTC (or naive).
+    """
+    ns = np.asarray(timestamps, dtype='datetime64[ns]').view(np.int64)
+    if len(ns) == 0:
+        return np.zeros(0, dtype=np.int64)
+    hours = ns // NS_PER_HOUR
+    days = hours // HOURS_PER_DAY
+    # 1970-01-01 was a Thursday, so Monday is day 0 after shifting by 3
+    day_of_week = (days + 3) % 7
+
+    first, last = (np.datetime64(int(d), 'D').astype('datetime64[M]') for d in (days.min(), days.max()))
+    months = np.arange(first, last + 1)
+    month = (np.searchsorted(months.astype('datetime64[D]').astype(np.int64), days, side='right') - 1
+             + months[0].astype(np.int64)) % 12
+
+    return (month * 7 + day_of_week) * 24 + hours % HOURS_PER_DAY
+
+
+def calendar_codes(timestamps, key):
+    """
+    Integer calendar codes (0..bins-1) for one key
+    """
+    if key not in _CELL_KEYS:
+        raise ValueError(f"Unknown calendar key: {key}")
+    return _CELL_KEYS[key][calendar_cells(timestamps)]
+
+
+class SeasonalProfile:
+    """
+    Count, mean and variance per joint calendar cell, accumulated with np.bincount
+
+    Each update reduces a chunk into the 2016 month x weekday x hour cells
+    with three bincounts (count, mean, squared deviations) and merges it into
+    the running cell moments (Chan et al.), so data streams through in
+    bounded memory and chunks of any size combine exactly. Every calendar
+    profile is then an exact merge of cells. NaN values are skipped.
+    """
+
+    def __init__(self):
+        self.n = np.zeros(N_CELLS)
+        self.mean = np.zeros(N_CELLS)
+        self.m2 = np.zeros(N_CELLS)
+
+    def update(self, timestamps, values):
+        """Add a chunk of observations"""
+        values = np.asarray(values, dtype=float)
+        cells = calendar_cells(timestamps)
+        valid = ~np.isnan(values)
+        if not valid.all():
+            cells, values = cells[valid], values[valid]
+
+        n_b = np.bincount(cells, minlength=N_CELLS).astype(float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean_b = np.where(n_b > 0, np.bincount(cells, weights=values, minlength=N_CELLS) / n_b, 0.0)
+        m2_b = np.bincount(cells, weights=(values - mean_b[cells]) ** 2, minlength=N_CELLS)
+        self._merge(n_b, mean_b, m2_b)
+        return self
+
+    def _merge(self, n_b, mean_b, m2_b):
+        n = self.n + n_b
+        delta = mean_b - self.mean
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.mean = np.where(n > 0, self.mean + delta * n_b / n, 0.0)
+            self.m2 = self.m2 + m2_b + np.where(n > 0, delta ** 2 * self.n * n_b / n, 0.0)
+        self.n = n
+
+    def profile(self, key, confidence=0.95):
+        """
+        Per-bin table with mean, std, confidence interval and ratio to the overall mean
+
+        The attrs carry a one-way ANOVA of equal means across bins.
+        """
+        labels = CALENDAR_KEYS[key]
+        codes = _CELL_KEYS[key]
+        bins = len(labels)
+
+        n = np.bincount(codes, weights=self.n, minlength=bins)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = np.bincount(codes, weights=self.n * self.mean, minlength=bins) / n
+            mean_filled = np.where(n > 0, mean, 0.0)
+            m2 = np.bincount(codes, weights=self.m2 + self.n * (self.mean - mean_filled[codes]) ** 2,
+                             minlength=bins)
+            std = np.sqrt(m2 / (n - 1))
+            half_width = stats.t.ppf(0.5 + confidence / 2, np.maximum(n - 1, 1)) * std / np.sqrt(n)
+            overall = np.sum(n * mean_filled) / n.sum()
+            table = pd.DataFrame({
+                'n': n.astype(np.int64),
+                'mean': mean,
+                'std': std,
+                'ci_low': mean - half_width,
+                'ci_high': mean + half_width,
+                'relative_to_overall': mean / overall
+            }, index=pd.Index(labels, name=key))
+
+        populated = n > 0
+        df_between, df_within = populated.sum() - 1, n.sum() - populated.sum()
+        ss_between = np.sum(n * (mean_filled - overall) ** 2)
+        ss_within = m2.sum()
+        if df_between > 0 and df_within > 0 and ss_within > 0:
+            f_stat = (ss_between / df_between) / (ss_within / df_within)
+            table.attrs['anova_f_statistic'] = f_stat
+            table.attrs['anova_p_value'] = stats.f.sf(f_stat, df_between, df_within)
+        return table
+
+
+def seasonal_profiles(values, keys=('day_of_week', 'month', 'weekend'), confidence=0.95,
+                      chunk_size=20_000_000):
+    """
+    Seasonal profiles of a Series with a DatetimeIndex (e.g. Abs_Return)
+
+    values can also be an iterable of Series chunks (e.g. minute bars read
+    file by file); long inputs are processed chunk_size rows at a time.
+    Returns a dict of profile tables keyed by calendar key.
+    """
+    accumulator = SeasonalProfile()
+    chunks = [values] if isinstance(values, pd.Series) else values
+
+    for chunk in chunks:
+        timestamps = chunk.index.to_numpy(dtype='datetime64[ns]')
+        data = chunk.to_numpy(dtype=float)
+        for start in range(0, len(data), chunk_size):
+            accumulator.update(timestamps[start:start + chunk_size], data[start:start + chunk_size])
+
+    return {key: accumulator.profile(key, confidence) for key in keys}
+
+
+def volatility_profiles(btc_data, column='Abs_Return', confidence=0.95):
+    """
+    Day-of-week, month and weekend profiles of absolute returns, plus hour of day for intraday data
+    """
+    series = btc_data[column].dropna()
+    keys = ['day_of_week', 'month', 'weekend']
+    if np.any(series.index.to_numpy(dtype='datetime64[ns]').view(np.int64) % (NS_PER_HOUR * HOURS_PER_DAY)):
+        keys.append('hour')
+    return seasonal_profiles(series, keys, confidence)
+
+
+def bin_factors(btc_data, keys=('day_of_week',), column='Abs_Return'):
+    """
+    Volatility factor per calendar bin (bin mean / overall mean), keyed by calendar key
+
+    The result is plain lists, so it can be saved and passed back to
+    seasonal_factors/deseasonalize to apply fixed factors to new data.
+    """
+    profiles = seasonal_profiles(btc_data[column].dropna(), keys)
+    return {key: profiles[key]['relative_to_overall'].tolist() for key in keys}
+
+
+def seasonal_factors(btc_data, keys=('day_of_week',), column='Abs_Return', factors=None):
+    """
+    Multiplicative volatility factor per row: product over keys of the bin mean / overall mean
+
+    factors (from bin_factors) fixes the per-bin factors instead of estimating them from btc_data.
+    """
+    if factors is None:
+        factors = bin_factors(btc_data, keys, column)
+    timestamps = btc_data.index.to_numpy(dtype='datetime64[ns]')
+    factor = np.ones(len(btc_data))
+    for key, values in factors.items():
+        factor *= np.asarray(values, dtype=float)[calendar_codes(timestamps, key)]
+    return pd.Series(factor, index=btc_data.index, name='seasonal_factor')
+
+
+def deseasonalize(btc_data, keys=('day_of_week',), column='Abs_Return', factors=None):
+    """
+    Copy of btc_data with Daily_Return and Abs_Return divided by their seasonal volatility factor
+
+    Use before the event study so calendar effects (e.g. quiet weekends)
+    are not mistaken for event impacts. Pass factors (from bin_factors) to
+    reuse previously estimated factors, e.g. when extending a series.
+    """
+    factor = seasonal_factors(btc_data, keys, column, factors)
+    adjusted = btc_data.copy()
+    for name in ['Daily_Return', 'Abs_Return']:
+        if name in adjusted:
+            adjusted[name] = adjusted[name] / factor
+    return adjusted
+
+
+if __name__ == "__main__":
+    from data_collection.bitcoin_prices import load_bitcoin_data
+
+    btc_data = load_bitcoin_data()
+    profiles = volatility_profiles(btc_data)
+    for key, profile in profiles.items():
+        print(f"\n{key} profile of Abs_Return (ANOVA p={profile.attrs.get('anova_p_value', np.nan):.4f}):")
+        print(profile[['n', 'mean', 'ci_low', 'ci_high', 'relative_to_overall']])
+
+    # Scale check on a synthetic year of minute returns with an intraday pattern
+    minutes = pd.date_range('2024-01-01', periods=525_600, freq='min')
+    hourly_scale = 1 + 0.5 * np.sin(np.arange(len(minutes)) / 60 / 24 * 2 * np.pi)
+    minute_returns = pd.Series(np.abs(np.random.default_rng(0).standard_normal(len(minutes))) * hourly_scale,
+                               index=minutes)
+    print("\nSynthetic minute data, hour-of-day profile:")
+    print(seasonal_profiles(minute_returns, ['hour'])['hour'][['n', 'mean', 'relative_to_overall']].head())
@@ -0,0 +1,137 @@
+# File: src/analysis/shared_data.py
+
+import os
+import sys
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+# Shared blocks already attached in this (worker) process, by block name
+_attached = {}
+
+
+def _release(blocks):
+    """Close and unlink blocks; safe to call more than once"""
+    for block in blocks:
+        try:
+            block.close()
+            block.unlink()
+        except FileNotFoundError:
+            pass
+    blocks.clear()
+
+
+class SharedArrays:
+    """
+    Publish NumPy arrays once in shared memory for process-pool workers
+
+    Each array is copied into its own multiprocessing.shared_memory block;
+    handles (name, shape, dtype) are small and picklable, and attach() turns
+    them back into read-only views without copying. Use as a context
+    manager: blocks are unlinked on exit whether or not the work failed, and
+    a finalizer unlinks them if the object is dropped without closing.
+    """
+
+    def __init__(self, arrays):
+        self._blocks = []
+        self._finalizer = weakref.finalize(self, _release, self._blocks)
+        self.handles = {}
+        try:
+            for key, array in arrays.items():
+                array = np.ascontiguousarray(array)
+                if array.dtype == object:
+                    raise TypeError(f"Cannot share object array '{key}'")
+                block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                self._blocks.append(block)
+                np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+                self.handles[key] = (block.name, array.shape, array.dtype.str)
+        except Exception:
+            self.close()
+            raise
+
+    def close(self):
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def attach(handles):
+    """
+    Reconstruct read-only NumPy views from SharedArrays handles (in a worker)
+
+    Blocks are opened once per process and cached. Pool workers share the
+    publishing process's resource tracker, which keeps owning the blocks, so
+    only SharedArrays unlinks them.
+    """
+    arrays = {}
+    for key, (name, shape, dtype) in handles.items():
+        if name not in _attached:
+            _attached[name] = shared_memory.SharedMemory(name=name)
+        view = np.ndarray(shape, np.dtype(dtype), buffer=_attached[name].buf)
+        view.flags.writeable = False
+        arrays[key] = view
+    return arrays
+
+
+def frame_arrays(df, columns=None):
+    """
+    Columns of a DataFrame as float64 arrays plus the index as int64 nanoseconds
+    """
+    columns = list(df.columns if columns is None else columns)
+    arrays = {column: df[column].to_numpy(dtype=float) for column in columns}
+    if isinstance(df.index, pd.DatetimeIndex):
+        arrays['index'] = df.index.to_numpy(dtype='datetime64[ns]').view(np.int64)
+    return arrays
+
+
+def _run_shared(func, handles, task):
+    return func(attach(handles), task)
+
+
+def parallel_map(func, tasks, arrays=None, n_workers=None):
+    """
+    Run func(arrays, task) for every task, in a process pool when useful
+
+    arrays (a dict of NumPy arrays, e.g. from frame_arrays) is published once
+    in shared memory and each worker receives views of it, so only the small
+    task descriptions are pickled. With one worker or task everything runs
+    in-process on the original arrays. Results come back in task order.
+    """
+    tasks = list(tasks)
+    arrays = arrays or {}
+    n_workers = n_workers or os.cpu_count() or 1
+    if n_workers == 1 or len(tasks) <= 1:
+        return [func(arrays, task) for task in tasks]
+
+    with SharedArrays(arrays) as shared:
+        with ProcessPoolExecutor(max_workers=min(n_workers, len(tasks))) as pool:
+            return list(pool.map(_run_shared, [func] * len(tasks), [shared.handles] * len(tasks), tasks))
+
+
+def _window_mean(arrays, bounds):
+    start, end = bounds
+    return float(np.nanmean(arrays['Abs_Return'][start:end]))
+
+
+if __name__ == "__main__":
+    import time
+    from data_collection.bitcoin_prices import load_bitcoin_data
+
+    btc_data = load_bitcoin_data()
+    arrays = frame_arrays(btc_data, ['Close', 'Daily_Return', 'Abs_Return'])
+
+    # Mean absolute return over yearly windows, computed by workers on shared views
+    bounds = [(start, start + 365) for start in range(0, len(btc_data) - 365, 30)]
+    start = time.time()
+    means = parallel_map(_window_mean, bounds, arrays)
+    print(f"{len(means)} windows in {time.time() - start:.2f}s, first: {means[0]:.4f}, last: {means[-1]:.4f}")
@@ -0,0 +1,216 @@
+# File: src/analysis/streaming.py
+
+import asyncio
+import sys
+from collections import deque
+from datetime import timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from analysis.descriptive_stats import RunningMoments
+
+
+class OnlineVolatility:
+    """
+    Daily_Return, rolling and EWMA volatility and return moments, updated per bar
+
+    Every update is O(1): the rolling window keeps its own add/remove moments,
+    EWMA uses the RiskMetrics recursion and the full-history moments are
+    RunningMoments. Rolling volatility matches Volatility_30d (ddof=1).
+    """
+
+    def __init__(self, window=30, ewma_lambda=0.94):
+        self.window = window
+        self.ewma_lambda = ewma_lambda
+        self.last_close = None
+        self.window_returns = deque()
+        self.window_moments = RunningMoments()
+        self.moments = RunningMoments()
+        self.ewma_variance = np.nan
+
+    def update(self, close):
+        """Consume one close price, returning the derived columns for the bar"""
+        if self.last_close is None:
+            self.last_close = close
+            return None
+
+        daily_return = close / self.last_close - 1
+        self.last_close = close
+
+        self.window_returns.append(daily_return)
+        self.window_moments.add(daily_return)
+        if len(self.window_returns) > self.window:
+            self.window_moments.remove(self.window_returns.popleft())
+
+        if np.isnan(self.ewma_variance):
+            self.ewma_variance = daily_return ** 2
+        else:
+            self.ewma_variance = self.ewma_lambda * self.ewma_variance + (1 - self.ewma_lambda) * daily_return ** 2
+
+        self.moments.add(daily_return)
+
+        return {
+            'Daily_Return': daily_return,
+            'Abs_Return': abs(daily_return),
+            'Volatility_30d': self.window_moments.std if len(self.window_returns) == self.window else np.nan,
+            'EWMA_Volatility': np.sqrt(self.ewma_variance)
+        }
+
+
+class EventMonitor:
+    """
+    Incremental version of event_impact_analysis for a live feed
+
+    Each registered event collects Abs_Return over the same before/after windows
+    as event_impact_analysis. Once both sides hold more than 3 observations the
+    same t-test is evaluated on every new bar, and an alert is emitted the first
+    time post-event volatility significantly exceeds the pre-event baseline
+    (and by at least min_ratio).
+    """
+
+    def __init__(self, window_days=10, alpha=0.05, min_ratio=1.0):
+        self.window_days = window_days
+        self.alpha = alpha
+        self.min_ratio = min_ratio
+        self.pending = []
+        self.active = {}
+        self.history = deque()
+
+    def register_event(self, event_id, date, event='', severity=np.nan):
+        """Register an event; it becomes active when the feed reaches its pre-window"""
+        self.pending.append({
+            'event_id': event_id,
+            'event': event,
+            'severity': severity,
+            'date': pd.Timestamp(date),
+            'before': RunningMoments(),
+            'after': RunningMoments(),
+            'alerted': False
+        })
+        self.pending.sort(key=lambda e: e['date'])
+
+    def register_events(self, events_data):
+        for _, event in events_data.iterrows():
+            self.register_event(event['event_id'], event['date'], event['event'], event['severity'])
+
+    def _activate(self, timestamp):
+        window = timedelta(days=self.window_days)
+        while self.pending and self.pending[0]['date'] - window <= timestamp:
+            event = self.pending.pop(0)
+            before_start = event['date'] - window
+            before_end = event['date'] - timedelta(days=1)
+            after_start = event['date'] + timedelta(days=1)
+            after_end = min(event['date'] + window, timestamp)
+            # Backfill both windows for events registered late, up to and including this bar
+            for ts, value in self.history:
+                if before_start <= ts <= before_end:
+                    event['before'].add(value)
+                elif after_start <= ts <= after_end:
+                    event['after'].add(value)
+            self.active[event['event_id']] = event
+
+    def update(self, timestamp, abs_return):
+        """Consume one Abs_Return observation, returning any new alerts"""
+        timestamp = pd.Timestamp(timestamp)
+        window = timedelta(days=self.window_days)
+
+        # Keep enough history to backfill events registered up to window_days late
+        self.history.append((timestamp, abs_return))
+        while self.history and self.history[0][0] < timestamp - 2 * window:
+            self.history.popleft()
+
+        # Events activated by this bar already backfilled it (before or after) from history
+        newly_active = set()
+        if self.pending and self.pending[0]['date'] - window <= timestamp:
+            before = set(self.active)
+            self._activate(timestamp)
+            newly_active = set(self.active) - before
+
+        alerts = []
+        for event_id in list(self.active):
+            event = self.active[event_id]
+            date = event['date']
+
+            if timestamp > date + window:
+                del self.active[event_id]
+                continue
+            if event_id not in newly_active:
+                if date - window <= timestamp <= date - timedelta(days=1):
+                    event['before'].add(abs_return)
+                elif date + timedelta(days=1) <= timestamp:
+                    event['after'].add(abs_return)
+            if date + timedelta(days=1) <= timestamp:
+                alert = self._check(event, timestamp)
+                if alert is not None:
+                    alerts.append(alert)
+
+        return alerts
+
+    def _check(self, event, timestamp):
+        before, after = event['before'], event['after']
+        if event['alerted'] or before.n <= 3 or after.n <= 3:
+            return None
+
+        t_stat, p_value = stats.ttest_ind_from_stats(before.mean, before.std, before.n,
+                                                     after.mean, after.std, after.n)
+        ratio = after.mean / before.mean if before.mean > 0 else np.inf
+        if after.mean <= before.mean or p_value >= self.alpha or ratio < self.min_ratio:
+            return None
+
+        event['alerted'] = True
+        return {
+            'alert': 'post_event_volatility',
+            'timestamp': timestamp,
+            'event_id': event['event_id'],
+            'event': event['event'],
+            'severity': event['severity'],
+            'before_volatility_mean': before.mean,
+            'after_volatility_mean': after.mean,
+            'volatility_ratio': ratio,
+            't_statistic': t_stat,
+            'p_value': p_value
+        }
+
+
+def print_alert(alert):
+    print(f"[ALERT {alert['timestamp']}] event {alert['event_id']} '{alert['event']}': "
+          f"post-event volatility {alert['after_volatility_mean']:.4f} vs baseline "
+          f"{alert['before_volatility_mean']:.4f} (x{alert['volatility_ratio']:.2f}, p={alert['p_value']:.4f})")
+
+
+async def stream_analysis(source, events_data=None, on_alert=print_alert, on_bar=None,
+                          window=30, ewma_lambda=0.94, window_days=10, alpha=0.05):
+    """
+    Run the analysis against a live source of bars
+
+    source is any async iterable of bar dicts (see data_collection.live_feed).
+    on_alert / on_bar may be plain functions or coroutines; on_bar receives the
+    bar extended with the derived columns. Returns the final online state.
+    """
+    volatility = OnlineVolatility(window, ewma_lambda)
+    monitor = EventMonitor(window_days, alpha)
+    if events_data is not None:
+        monitor.register_events(events_data)
+
+    async def emit(callback, payload):
+        if callback is None:
+            return
+        result = callback(payload)
+        if asyncio.iscoroutine(result):
+            await result
+
+    async for bar in source:
+        derived = volatility.update(bar['close'])
+        if derived is None:
+            continue
+
+        await emit(on_bar, {**bar, **derived})
+        for alert in monitor.update(bar['date'], derived['Abs_Return']):
+            await emit(on_alert, alert)
+
+    return {'volatility': volatility, 'monitor': monitor}
@@ -0,0 +1,222 @@
+# File: src/analysis/volatility_forecasting.py
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from analysis.kernels import ewma_variance
+from analysis.risk import fit_garch
+from analysis.shared_data import parallel_map
+
+MODELS = ('har', 'ewma', 'garch')
+
+
+def _future_mean(rv, horizon):
+    """
+    Target for the forecast made at t: mean realized variance over t+1..t+horizon
+    """
+    running = np.concatenate([[0.0], np.cumsum(rv)])
+    target = np.full(len(rv), np.nan)
+    target[:len(rv) - horizon] = (running[horizon + 1:] - running[1:len(rv) - horizon + 1]) / horizon
+    return target
+
+
+def har_features(rv):
+    """
+    HAR-RV regressors: intercept, daily, weekly (5d) and monthly (22d) realized variance
+    """
+    rv = pd.Series(rv)
+    features = np.column_stack([
+        np.ones(len(rv)),
+        rv.to_numpy(),
+        rv.rolling(5).mean().to_numpy(),
+        rv.rolling(22).mean().to_numpy()
+    ])
+    return features
+
+
+def har_forecasts(rv, horizon=1, min_train=250, scheme='expanding', window=500):
+    """
+    Walk-forward HAR-RV forecasts with rank-one updates of the normal equations
+
+    At each day t the pair whose target has just been fully observed is added
+    to X'X and X'y (and, for a rolling scheme, the pair leaving the window is
+    removed), so no step refits from scratch.
+    """
+    rv = np.asarray(rv, dtype=float)
+    x = har_features(rv)
+    y = _future_mean(rv, horizon)
+    usable = ~np.isnan(x).any(axis=1)
+
+    k = x.shape[1]
+    xtx = np.zeros((k, k))
+    xty = np.zeros(k)
+    n_pairs = 0
+    floor = np.nanmin(rv[rv > 0]) if np.any(rv > 0) else 1e-12
+    forecasts = np.full(len(rv), np.nan)
+
+    for t in range(len(rv)):
+        # The target of the pair made at t - horizon is known at t
+        s = t - horizon
+        if s >= 0 and usable[s]:
+            xtx += np.outer(x[s], x[s])
+            xty += x[s] * y[s]
+            n_pairs += 1
+        if scheme == 'rolling':
+            s_old = t - horizon - window
+            if s_old >= 0 and usable[s_old]:
+                xtx -= np.outer(x[s_old], x[s_old])
+                xty -= x[s_old] * y[s_old]
+                n_pairs -= 1
+
+        if t + 1 >= min_train and n_pairs > k and usable[t]:
+            beta = np.linalg.lstsq(xtx, xty, rcond=None)[0]
+            forecasts[t] = max(x[t] @ beta, floor)
+
+    return forecasts
+
+
+def ewma_forecasts(returns, ewma_lambda=0.94):
+    """
+    RiskMetrics EWMA variance forecasts
+
+    The EWMA forecast is flat across horizons, so the same series is the
+    forecast of the mean daily variance over any horizon.
+    """
+    return ewma_variance(np.asarray(returns, dtype=float) ** 2, ewma_lambda)
+
+
+def garch_forecasts(returns, horizon=1, min_train=250, scheme='expanding', window=500, refit_every=22):
+    """
+    Walk-forward GARCH(1,1) forecasts, refitted every refit_every days
+
+    Each refit is warm-started from the previous parameters; between refits the
+    conditional variance is filtered forward with fixed parameters in O(1) per day.
+    """
+    r = np.asarray(returns, dtype=float)
+    forecasts = np.full(len(r), np.nan)
+    fit = None
+    sigma2 = None
+
+    for t in range(min_train - 1, len(r)):
+        if fit is None or (t - (min_train - 1)) % refit_every == 0:
+            start = 0 if scheme == 'expanding' else max(0, t + 1 - window)
+            fit = fit_garch(r[start:t + 1], start=fit)
+            eps = fit['last_residual']
+            sigma2 = fit['last_variance']
+        else:
+            eps = r[t] - fit['mu']
+            sigma2 = fit['omega'] + fit['alpha'] * eps_prev ** 2 + fit['beta'] * sigma2
+        eps_prev = eps
+
+        # One-step variance, then the mean over the horizon reverting to the long run
+        next_var = fit['omega'] + fit['alpha'] * eps ** 2 + fit['beta'] * sigma2
+        persistence = fit['alpha'] + fit['beta']
+        long_run = fit['omega'] / (1 - persistence)
+        decay = persistence ** np.arange(horizon)
+        forecasts[t] = np.mean(long_run + decay * (next_var - long_run)) + fit['mu'] ** 2
+
+    return forecasts
+
+
+def volatility_losses(forecasts, realized):
+    """
+    MSE and QLIKE (Patton's robust form, log f + rv / f) of variance forecasts
+    """
+    f = np.asarray(forecasts, dtype=float)
+    rv = np.asarray(realized, dtype=float)
+    valid = ~np.isnan(f) & ~np.isnan(rv) & (f > 0)
+    f, rv = f[valid], rv[valid]
+    return {
+        'n_forecasts': int(valid.sum()),
+        'mse': np.mean((rv - f) ** 2),
+        'qlike': np.mean(np.log(f) + rv / f)
+    }
+
+
+def _run_model(returns, model, horizon, min_train, scheme, window, realized):
+    r = np.asarray(returns, dtype=float)
+    rv = r ** 2 if realized is None else np.asarray(realized, dtype=float)
+
+    if model == 'har':
+        forecasts = har_forecasts(rv, horizon, min_train, scheme, window)
+    elif model == 'ewma':
+        forecasts = ewma_forecasts(r)
+        forecasts[:min_train - 1] = np.nan
+    elif model == 'garch':
+        forecasts = garch_forecasts(r, horizon, min_train, scheme, window)
+    else:
+        raise ValueError(f"Unknown volatility model: {model}")
+
+    return forecasts, volatility_losses(forecasts, _future_mean(rv, horizon))
+
+
+def _run_task(arrays, task):
+    """
+    parallel_map worker: one (asset, model) pair, reading the asset's column of the shared panel
+    """
+    column, model, options = task
+    returns = arrays['returns'][:, column]
+    observed = ~np.isnan(returns)
+    realized = arrays['realized'][observed, column] if 'realized' in arrays else None
+    return _run_model(returns[observed], model, realized=realized, **options)
+
+
+def walk_forward_backtest(returns, models=MODELS, horizon=1, min_train=250, scheme='expanding',
+                          window=500, realized=None, n_workers=None):
+    """
+    Walk-forward backtest of volatility forecasters for one or several assets
+
+    returns is a Series (one asset) or DataFrame (one column per asset);
+    realized optionally supplies matching realized variances (e.g. from
+    intraday data), otherwise squared daily returns are the proxy. Every
+    (asset, model) combination is independent and runs through parallel_map
+    with the return panel in shared memory.
+    Returns (losses, forecasts): a DataFrame of MSE/QLIKE per asset and model,
+    and a dict of forecast Series keyed by (asset, model), in variance units.
+    """
+    frame = returns.to_frame() if isinstance(returns, pd.Series) else returns
+    realized_frame = None
+    if realized is not None:
+        realized_frame = realized.to_frame(frame.columns[0]) if isinstance(realized, pd.Series) else realized
+
+    # The return panel is shared once; each task only names its column and model
+    arrays = {'returns': frame.to_numpy(dtype=float)}
+    if realized_frame is not None:
+        arrays['realized'] = realized_frame.reindex(index=frame.index, columns=frame.columns).to_numpy(dtype=float)
+
+    options = {'horizon': horizon, 'min_train': min_train, 'scheme': scheme, 'window': window}
+    pairs = [(asset, model) for asset in frame.columns for model in models]
+    tasks = [(frame.columns.get_loc(asset), model, options) for asset, model in pairs]
+    outputs = parallel_map(_run_task, tasks, arrays, n_workers)
+
+    losses = []
+    forecasts = {}
+    for (asset, model), (forecast, loss) in zip(pairs, outputs):
+        losses.append({'asset': asset, 'model': model, **loss})
+        forecasts[(asset, model)] = pd.Series(forecast, index=frame[asset].dropna().index)
+
+    losses = pd.DataFrame(losses).set_index(['asset', 'model'])
+    losses['qlike_rank'] = losses.groupby(level='asset')['qlike'].rank()
+    return losses, forecasts
+
+
+if __name__ == "__main__":
+    project_root = Path(__file__).resolve().parents[2]
+
+    btc_data = pd.read_csv(project_root / 'data' / 'raw' / 'bitcoin_prices.csv', skiprows=2, header=0)
+    column_names = ['Date', 'Price', 'Close', 'High', 'Low', 'Open', 'Volume', 'Daily_Return', 'Volatility_30d', 'Abs_Return']
+    btc_data.columns = column_names
+    btc_data['Date'] = pd.to_datetime(btc_data['Date'], errors='coerce')
+    btc_data = btc_data.set_index('Date')
+    btc_data = btc_data[btc_data.index.notna()]
+    returns = btc_data['Daily_Return'].dropna().rename('BTC-USD')
+
+    for scheme in ['expanding', 'rolling']:
+        losses, forecasts = walk_forward_backtest(returns, scheme=scheme)
+        print(f"\nWalk-forward ({scheme}) one-day variance forecasts:")
+        print(losses)
@@ -3,6 +3,13 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import os
+import shutil
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from analysis.kernels import rolling_std
 
 def collect_bitcoin_data(start_date='2020-01-01', end_date='2024-12-31'):
     """
@@ -20,7 +27,7 @@ def collect_bitcoin_data(start_date='2020-01-01', end_date='2024-12-31'):
         btc['Daily_Return'] = btc['Close'].pct_change()
         
         # Calculate volatility (30-day rolling standard deviation)
-        btc['Volatility_30d'] = btc['Daily_Return'].rolling(window=30).std()
+        btc['Volatility_30d'] = rolling_std(btc['Daily_Return'], window=30)
         
         # Calculate absolute returns for volatility analysis
         btc['Abs_Return'] = abs(btc['Daily_Return'])
@@ -53,6 +60,96 @@ def save_bitcoin_data(data, filename='bitcoin_prices.csv'):
     data.to_csv(filepath)
     print(f"Data saved to {filepath}")
 
+def _data_filepath(filename='bitcoin_prices.csv'):
+    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return os.path.join(project_root, 'data', 'raw', filename)
+
+def load_bitcoin_data(filename='bitcoin_prices.csv'):
+    """
+    Load saved Bitcoin data, handling the 3-line header written for yf.download columns
+    """
+    filepath = _data_filepath(filename)
+    if not os.path.exists(filepath):
+        return None
+
+    with open(filepath, 'r', encoding='utf-8') as f:
+        header = f.readline().strip().split(',')
+        second = f.readline()
+
+    if second.startswith('Ticker'):
+        btc = pd.read_csv(filepath, skiprows=3, header=None, names=['Date'] + header[1:])
+    else:
+        btc = pd.read_csv(filepath)
+        btc = btc.rename(columns={btc.columns[0]: 'Date'})
+
+    btc['Date'] = pd.to_datetime(btc['Date'], errors='coerce')
+    btc = btc.dropna(subset=['Date']).set_index('Date').sort_index()
+    return btc.apply(pd.to_numeric, errors='coerce')
+
+def collect_new_bitcoin_bars(last_date, end_date=None):
+    """
+    Download raw OHLCV bars after last_date (exclusive) from Yahoo Finance
+    """
+    start_date = (pd.Timestamp(last_date) + timedelta(days=1)).strftime('%Y-%m-%d')
+    end_date = end_date or (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+    if start_date >= end_date:
+        return pd.DataFrame()
+
+    try:
+        bars = yf.download('BTC-USD', start=start_date, end=end_date, auto_adjust=False)
+    except Exception as e:
+        print(f"Error collecting new bars: {e}")
+        return None
+
+    if isinstance(bars.columns, pd.MultiIndex):
+        bars.columns = bars.columns.get_level_values(0)
+    bars.index.name = 'Date'
+    return bars[bars.index > pd.Timestamp(last_date)]
+
+def append_bitcoin_data(btc_data, new_bars, window=30):
+    """
+    Extend the derived columns with new bars, touching only the new rows
+
+    Daily_Return needs the last stored close and Volatility_30d the last
+    window - 1 stored returns, so the cost is O(len(new_bars)).
+    Returns the combined data and the newly derived rows.
+    """
+    new_bars = new_bars[new_bars.index > btc_data.index.max()].sort_index()
+    if len(new_bars) == 0:
+        return btc_data, new_bars
+
+    new_rows = new_bars.reindex(columns=btc_data.columns)
+
+    close = pd.concat([btc_data['Close'].iloc[-1:], new_bars['Close']])
+    new_rows['Daily_Return'] = close.pct_change().iloc[1:]
+
+    returns = pd.concat([btc_data['Daily_Return'].iloc[-(window - 1):], new_rows['Daily_Return']])
+    new_rows['Volatility_30d'] = rolling_std(returns, window=window)[-len(new_rows):]
+    new_rows['Abs_Return'] = abs(new_rows['Daily_Return'])
+
+    return pd.concat([btc_data, new_rows]), new_rows
+
+def append_bitcoin_rows(new_rows, filename='bitcoin_prices.csv'):
+    """
+    Append derived rows to the saved CSV without re-serialising the existing rows
+
+    The rows are appended to a byte copy of the file that then replaces it
+    atomically, so readers (e.g. the query service) never see a partial row.
+    """
+    filepath = _data_filepath(filename)
+    with open(filepath, 'r', encoding='utf-8') as f:
+        header = f.readline().strip().split(',')
+
+    temp_path = f"{filepath}.{os.getpid()}.tmp"
+    try:
+        shutil.copyfile(filepath, temp_path)
+        new_rows.reindex(columns=header[1:]).to_csv(temp_path, mode='a', header=False)
+        os.replace(temp_path, filepath)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    print(f"Appended {len(new_rows)} rows to {filepath}")
+
 # Example usage
 if __name__ == "__main__":
     btc_data = collect_bitcoin_data()
@@ -0,0 +1,87 @@
+import asyncio
+import json
+import pandas as pd
+
+from data_collection.bitcoin_prices import load_bitcoin_data
+
+# A bar is a plain dict: {'date', 'open', 'high', 'low', 'close', 'volume'}.
+# Any async iterable yielding bars can be used as a source for streaming mode.
+
+
+class ReplaySource:
+    """
+    Replay saved Bitcoin bars as a live feed (local stand-in for a websocket client)
+    """
+
+    def __init__(self, filename='bitcoin_prices.csv', delay=0.0, start_date=None):
+        self.filename = filename
+        self.delay = delay
+        self.start_date = start_date
+
+    async def __aiter__(self):
+        btc_data = load_bitcoin_data(self.filename)
+        if btc_data is None:
+            return
+        if self.start_date is not None:
+            btc_data = btc_data[btc_data.index >= pd.Timestamp(self.start_date)]
+
+        for date, row in btc_data.iterrows():
+            yield {
+                'date': date,
+                'open': row['Open'],
+                'high': row['High'],
+                'low': row['Low'],
+                'close': row['Close'],
+                'volume': row['Volume']
+            }
+            await asyncio.sleep(self.delay)
+
+
+def parse_kline_message(message):
+    """
+    Parse a Binance-style kline message into a bar, or None for non-final bars
+    """
+    payload = json.loads(message)
+    kline = payload.get('k', payload)
+    if not kline.get('x', True):
+        return None
+    return {
+        'date': pd.Timestamp(kline['t'], unit='ms'),
+        'open': float(kline['o']),
+        'high': float(kline['h']),
+        'low': float(kline['l']),
+        'close': float(kline['c']),
+        'volume': float(kline['v'])
+    }
+
+
+class WebSocketSource:
+    """
+    Consume bars from a websocket feed
+
+    parse_message turns one raw message into a bar (or None to skip it);
+    the connection is re-opened after a drop, waiting reconnect_delay seconds.
+    Requires the optional `websockets` package.
+    """
+
+    def __init__(self, url, parse_message=parse_kline_message, reconnect_delay=5.0):
+        self.url = url
+        self.parse_message = parse_message
+        self.reconnect_delay = reconnect_delay
+
+    async def __aiter__(self):
+        try:
+            import websockets
+        except ImportError:
+            raise ImportError("WebSocketSource requires the 'websockets' package: pip install websockets")
+
+        while True:
+            try:
+                async with websockets.connect(self.url) as ws:
+                    async for message in ws:
+                        bar = self.parse_message(message)
+                        if bar is not None:
+                            yield bar
+            except (OSError, websockets.ConnectionClosed) as e:
+                print(f"Feed disconnected ({e}), reconnecting in {self.reconnect_delay}s...")
+                await asyncio.sleep(self.reconnect_delay)
@@ -0,0 +1,74 @@
+import yfinance as yf
+import pandas as pd
+import os
+
+# Reference assets compared against Bitcoin: other coins, equities, gold, dollar, rates
+DEFAULT_ASSETS = {
+    'BTC-USD': 'Bitcoin',
+    'ETH-USD': 'Ethereum',
+    'SOL-USD': 'Solana',
+    'BNB-USD': 'BNB',
+    '^GSPC': 'S&P 500',
+    '^IXIC': 'Nasdaq Composite',
+    'GC=F': 'Gold futures',
+    'DX-Y.NYB': 'US Dollar Index',
+    '^TNX': 'US 10Y yield'
+}
+
+def collect_asset_returns(tickers=None, start_date='2020-01-01', end_date='2024-12-31', interval='1d'):
+    """
+    Collect daily returns for several assets from Yahoo Finance
+
+    Returns one column per ticker on the union of trading dates; assets that do
+    not trade on a date (e.g. equities at weekends) are NaN there.
+    """
+    tickers = list(tickers or DEFAULT_ASSETS)
+    print(f"Downloading data for {len(tickers)} assets...")
+    try:
+        prices = yf.download(tickers, start=start_date, end=end_date, interval=interval,
+                             auto_adjust=False, progress=False)['Close']
+        if isinstance(prices, pd.Series):
+            prices = prices.to_frame(tickers[0])
+
+        # Returns between consecutive observations of each asset
+        returns = prices.apply(lambda col: col.dropna().pct_change()).reindex(prices.index)
+        returns = returns[tickers].dropna(how='all')
+        returns.index.name = 'Date'
+
+        print(f"Asset returns collected: {len(returns)} dates x {returns.shape[1]} assets")
+        return returns
+
+    except Exception as e:
+        print(f"Error collecting asset data: {e}")
+        return None
+
+def save_asset_returns(returns, filename='asset_returns.csv'):
+    """
+    Save multi-asset returns to CSV file
+    """
+    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    data_dir = os.path.join(project_root, 'data', 'raw')
+
+    if not os.path.exists(data_dir):
+        os.makedirs(data_dir)
+
+    filepath = os.path.join(data_dir, filename)
+    returns.to_csv(filepath)
+    print(f"Asset returns saved to {filepath}")
+
+def load_asset_returns(filename='asset_returns.csv'):
+    """
+    Load multi-asset returns saved by save_asset_returns
+    """
+    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    filepath = os.path.join(project_root, 'data', 'raw', filename)
+    if not os.path.exists(filepath):
+        return None
+    return pd.read_csv(filepath, index_col='Date', parse_dates=['Date'])
+
+# Example usage
+if __name__ == "__main__":
+    asset_returns = collect_asset_returns()
+    if asset_returns is not None:
+        save_asset_returns(asset_returns)
+        print(asset_returns.tail())
@@ -0,0 +1,150 @@
+import io
+import numpy as np
+from scipy import stats
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+
+# Helpers for the fast plotting mode of plots.py: series are reduced to what
+# can be seen at the output resolution before reaching matplotlib, and figures
+# are drawn on an Agg canvas without going through pyplot.
+
+def _as_numeric(x):
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype('datetime64[ns]').view(np.int64)
+    return x.astype(float, copy=False)
+
+
+def minmax_decimate(x, y, n_bins):
+    """
+    Indices of the min and max point in each of n_bins equal-width x columns
+
+    Keeps every visible extreme of a line plot, so the rendered image is the
+    same as plotting all points. x must be sorted; NaNs in y are skipped.
+    Column boundaries come from a binary search on x, so the data is only
+    read once by the per-column argmin/argmax.
+    """
+    xn = _as_numeric(x)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= 2 * n_bins:
+        return np.flatnonzero(~np.isnan(y))
+
+    nan_mask = np.isnan(y)
+    if nan_mask.any():
+        y_low = np.where(nan_mask, np.inf, y)
+        y_high = np.where(nan_mask, -np.inf, y)
+    else:
+        y_low = y_high = y
+
+    boundaries = np.linspace(xn[0], xn[-1], n_bins + 1)[1:-1]
+    starts = np.concatenate([[0], np.searchsorted(xn, boundaries, side='left'), [n]])
+
+    keep = []
+    for lo, hi in zip(starts[:-1], starts[1:]):
+        if hi > lo:
+            keep.append(lo + np.argmin(y_low[lo:hi]))
+            keep.append(lo + np.argmax(y_high[lo:hi]))
+    keep = np.unique(np.array(keep + [0, n - 1]))
+    return keep[~nan_mask[keep]]
+
+
+def lttb_decimate(x, y, n_out):
+    """
+    Indices selected by Largest-Triangle-Three-Buckets downsampling
+
+    Better at preserving the visual shape than min/max when the output is a
+    few hundred points; each bucket is processed with vectorised numpy.
+    """
+    xn = _as_numeric(x)
+    y = np.asarray(y, dtype=float)
+    valid = np.flatnonzero(~np.isnan(y))
+    n = len(valid)
+    if n <= n_out or n_out < 3:
+        return valid
+
+    xv, yv = xn[valid].astype(float), y[valid]
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = xv[next_lo:next_hi].mean()
+        avg_y = yv[next_lo:next_hi].mean()
+
+        area = np.abs((xv[a] - avg_x) * (yv[lo:hi] - yv[a]) - (xv[a] - xv[lo:hi]) * (avg_y - yv[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+
+    return valid[selected]
+
+
+def distribution_summary(values, bins=50, n_quantiles=500):
+    """
+    Precomputed histogram, Q-Q and box-plot statistics from one sort of the data
+    """
+    s = np.sort(np.asarray(values, dtype=float))
+    s = s[~np.isnan(s)]
+    n = len(s)
+
+    edges = np.linspace(s[0], s[-1], bins + 1)
+    # Bins are half-open except the last, as in np.histogram
+    idx = np.searchsorted(s, edges, side='left')
+    idx[-1] = n
+    counts = np.diff(idx)
+    density = counts / (n * np.diff(edges))
+
+    # Q-Q points at a subset of the order statistics, using the Filliben
+    # medians of stats.probplot for their theoretical quantiles
+    positions = np.unique(np.linspace(0, n - 1, min(n, n_quantiles)).astype(np.int64))
+    u = (positions + 1 - 0.3175) / (n + 0.365)
+    u[positions == n - 1] = 0.5 ** (1.0 / n)
+    u[positions == 0] = 1 - 0.5 ** (1.0 / n)
+    theoretical = stats.norm.ppf(u)
+    sample = s[positions]
+    slope, intercept, r, _, _ = stats.linregress(theoretical, sample)
+
+    q1, med, q3 = np.quantile(s, [0.25, 0.5, 0.75], method='linear')
+    iqr = q3 - q1
+    whislo = s[np.searchsorted(s, q1 - 1.5 * iqr, side='left')]
+    whishi = s[np.searchsorted(s, q3 + 1.5 * iqr, side='right') - 1]
+    low_fliers = s[s < whislo]
+    high_fliers = s[s > whishi]
+    fliers = np.concatenate([low_fliers[minmax_decimate(np.arange(len(low_fliers)), low_fliers, 500)],
+                             high_fliers[minmax_decimate(np.arange(len(high_fliers)), high_fliers, 500)]])
+
+    return {
+        'edges': edges,
+        'density': density,
+        'qq_theoretical': theoretical,
+        'qq_sample': sample,
+        'qq_fit': (slope, intercept, r),
+        'box': {'med': med, 'q1': q1, 'q3': q3, 'whislo': whislo, 'whishi': whishi, 'fliers': fliers}
+    }
+
+
+def new_agg_figure(nrows, ncols, figsize):
+    """
+    Figure drawn on an Agg canvas, independent of the pyplot backend and state
+    """
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig, fig.subplots(nrows, ncols)
+
+
+def save_figure(fig, path, output_format='png', dpi=300):
+    """
+    Save a figure as png/svg/pdf, or as a standalone HTML page embedding the SVG
+    """
+    if output_format == 'html':
+        buffer = io.StringIO()
+        fig.savefig(buffer, format='svg', bbox_inches='tight')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f"<!DOCTYPE html>\n<html><head><meta charset='utf-8'><title>{path.stem}</title></head>\n"
+                    f"<body style='margin:0'>\n{buffer.getvalue()}\n</body></html>\n")
+    else:
+        fig.savefig(path, format=output_format, dpi=dpi, bbox_inches='tight')
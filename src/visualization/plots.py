@@ -4,13 +4,51 @@ from scipy import stats
 from pathlib import Path
 import sys
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from visualization.fast_render import minmax_decimate, distribution_summary, new_agg_figure, save_figure
+
+
+def _new_figure(nrows, ncols, figsize, fast):
+    if fast:
+        return new_agg_figure(nrows, ncols, figsize)
+    return plt.subplots(nrows, ncols, figsize=figsize)
+
+
+def _visible_points(series, fig, fast, dpi):
+    """
+    In fast mode keep only the min/max point of each output pixel column
+    """
+    if not fast:
+        return series.index, series.values
+    n_columns = int(fig.get_figwidth() * dpi)
+    keep = minmax_decimate(series.index.values, series.values, n_columns)
+    return series.index[keep], series.values[keep]
+
+
+def _finish_figure(fig, name, fast, show, output_format, dpi):
+    results_dir = Path(__file__).resolve().parents[2] / 'results'
+    results_dir.mkdir(parents=True, exist_ok=True)
+    path = results_dir / f'{name}.{output_format}'
+    save_figure(fig, path, output_format, dpi)
+    if fast:
+        return
+    if show:
+        plt.show()
+    else:
+        plt.close(fig)
+
 
 #this fuction creates a time series visualization of bitcoin data
-def plot_bitcoin_timeseries(btc_data):
+def plot_bitcoin_timeseries(btc_data, fast=False, show=True, output_format='png', dpi=300):
     """
     Create time series plots for Bitcoin price and volatility
+
+    fast=True renders long/high-frequency series headlessly: each line is
+    min/max-decimated per pixel column and drawn on an Agg canvas without
+    pyplot or show(). output_format may be png, svg, pdf or html.
     """
-    fig, axes = plt.subplots(3, 1, figsize=(15, 12))
+    fig, axes = _new_figure(3, 1, (15, 12), fast)
     
     # The code below ientify the correct column name for Bitcoin closing price.
     # Different datasets may use variations (e.g., 'Close', 'BTC-USD', etc.),
@@ -28,39 +66,39 @@ def plot_bitcoin_timeseries(btc_data):
         return
     
     # Bitcoin price plot
-    axes[0].plot(btc_data.index, btc_data[close_col], color='orange', linewidth=1)
+    axes[0].plot(*_visible_points(btc_data[close_col], fig, fast, dpi), color='orange', linewidth=1)
     axes[0].set_title('Bitcoin Price Over Time (2020-2024)', fontsize=14, fontweight='bold')
     axes[0].set_ylabel('Price (USD)')
     axes[0].grid(True, alpha=0.3)
     
     # Daily returns plot
-    axes[1].plot(btc_data.index, btc_data['Daily_Return'], color='blue', alpha=0.7)
+    axes[1].plot(*_visible_points(btc_data['Daily_Return'], fig, fast, dpi), color='blue', alpha=0.7)
     axes[1].set_title('Bitcoin Daily Returns', fontsize=14, fontweight='bold')
     axes[1].set_ylabel('Daily Return (%)')
     axes[1].grid(True, alpha=0.3)
     axes[1].axhline(y=0, color='red', linestyle='--', alpha=0.5)
 
     # 30-day volatility plot
-    axes[2].plot(btc_data.index, btc_data['Volatility_30d'], color='red', linewidth=1)
+    axes[2].plot(*_visible_points(btc_data['Volatility_30d'], fig, fast, dpi), color='red', linewidth=1)
     axes[2].set_title('Bitcoin 30-Day Rolling Volatility', fontsize=14, fontweight='bold')
     axes[2].set_ylabel('Volatility (Std Dev)')
     axes[2].set_xlabel('Date')
     axes[2].grid(True, alpha=0.3)
     
-    plt.tight_layout()
+    fig.tight_layout()
     
     # Ensure results directory exists and save figure
-    results_dir = Path(__file__).resolve().parents[2] / 'results'
-    results_dir.mkdir(parents=True, exist_ok=True)
-    plt.savefig(results_dir / 'bitcoin_timeseries.png', dpi=300, bbox_inches='tight')
-    plt.show()
+    _finish_figure(fig, 'bitcoin_timeseries', fast, show, output_format, dpi)
 
 
 
 # This function creates distribution plots for bitcoin daily returns    
-def plot_distribution_analysis(btc_data):
+def plot_distribution_analysis(btc_data, fast=False, show=True, output_format='png', dpi=300):
     """
     Create distribution plots for Bitcoin returns
+
+    fast=True draws the histogram, Q-Q and box plot from precomputed bins and
+    quantiles (one sort of the data) and decimates the time series panel.
     """
     # Handle different possible column names for Daily_Return
     returns_col = None
@@ -75,37 +113,50 @@ def plot_distribution_analysis(btc_data):
     
     returns = btc_data[returns_col].dropna()
     
-    fig, axes = plt.subplots(2, 2, figsize=(15, 10))
+    fig, axes = _new_figure(2, 2, (15, 10), fast)
+    summary = distribution_summary(returns, bins=50) if fast else None
 
 
         # Histogram
-    axes[0,0].hist(returns, bins=50, density=True, alpha=0.7, color='skyblue', edgecolor='black')
+    if fast:
+        axes[0,0].stairs(summary['density'], summary['edges'], fill=True, alpha=0.7, color='skyblue')
+        axes[0,0].stairs(summary['density'], summary['edges'], color='black', linewidth=0.5)
+    else:
+        axes[0,0].hist(returns, bins=50, density=True, alpha=0.7, color='skyblue', edgecolor='black')
     axes[0,0].set_title('Distribution of Bitcoin Daily Returns')
     axes[0,0].set_xlabel('Daily Return')
     axes[0,0].set_ylabel('Density')
     
     # Q-Q plot
-    stats.probplot(returns, dist="norm", plot=axes[0,1])
+    if fast:
+        slope, intercept, _ = summary['qq_fit']
+        osm = summary['qq_theoretical']
+        axes[0,1].plot(osm, summary['qq_sample'], 'bo')
+        axes[0,1].plot(osm, slope * osm + intercept, 'r-')
+        axes[0,1].set_xlabel('Theoretical quantiles')
+        axes[0,1].set_ylabel('Ordered Values')
+    else:
+        stats.probplot(returns, dist="norm", plot=axes[0,1])
     axes[0,1].set_title('Q-Q Plot (Normal Distribution)')
     
     # Box plot
-    axes[1,0].boxplot(returns)
+    if fast:
+        axes[1,0].bxp([summary['box']])
+    else:
+        axes[1,0].boxplot(returns)
     axes[1,0].set_title('Box Plot of Daily Returns')
     axes[1,0].set_ylabel('Daily Return')
     
     # Time series of returns
-    axes[1,1].plot(btc_data.index, returns, alpha=0.7, color='green')
+    axes[1,1].plot(*_visible_points(returns, fig, fast, dpi), alpha=0.7, color='green')
     axes[1,1].set_title('Daily Returns Over Time')
     axes[1,1].set_xlabel('Date')
     axes[1,1].set_ylabel('Daily Return')
     
-    plt.tight_layout()
+    fig.tight_layout()
     
     # Ensure results directory exists and save figure
-    results_dir = Path(__file__).resolve().parents[2] / 'results'
-    results_dir.mkdir(parents=True, exist_ok=True)
-    plt.savefig(results_dir / 'distribution_analysis.png', dpi=300, bbox_inches='tight')
-    plt.show()
+    _finish_figure(fig, 'distribution_analysis', fast, show, output_format, dpi)
 
 
     